@@ -1,24 +1,119 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import (
+    JSONResponse,
+    PlainTextResponse,
+    Response,
+    StreamingResponse,
+)
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
+import asyncio
 import sys
 import os
-import glob
+import hashlib
+import json
 import logging
 import traceback
+import numpy as np
 import pandas as pd
 from .models.QLearningTrader import QLearningTrader
 from .models.RandomForestTrader import RandomForestTrader
-from .utils.utility import compute_portvals
+from .utils.utility import coerce_indicator_params, process_data
+from .utils.portfolio import PortfolioSimulator
+from .utils.price_store import get_price_store
+from .utils.symbol_catalog import get_symbol_catalog
+from .utils.downsample import DOWNSAMPLE_METHODS, downsample_indices
+from .utils.serialization import compress, encode_json, iso_dates, json_response
+from .utils.cache import LRUCache
+from .utils.indicator_cache import indicator_cache
+from .utils.metrics import cache_collector, registry, stage_timer
+from .utils.model_registry import ModelRegistry, config_key
+from .utils.sweep import (
+    DEFAULT_INDICATORS,
+    RANK_METRICS,
+    SweepContext,
+    expand_grid,
+    precompute_indicators,
+    ranked_sweep,
+)
+from .utils.live import LiveSession
+from .utils.universe import UniverseContext, universe_events
+from .utils.walk_forward import WalkForwardContext, generate_windows, walk_forward
+from .utils.jobs import (
+    CANCELLED,
+    FAILED,
+    QUEUED,
+    RUNNING,
+    SUCCEEDED,
+    JobExecutor,
+    JobQueueFull,
+)
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 logging.basicConfig(level=logging.DEBUG)
 
-# Store for trained models
-trained_models: Dict[str, object] = {}
+MODEL_CLASSES = {
+    "QLearningTrader": QLearningTrader,
+    "RandomForestTrader": RandomForestTrader,
+}
+
+# Store for trained models, keyed by their full training configuration
+model_registry = ModelRegistry(MODEL_CLASSES)
+
+# Serialized /api/plot responses keyed by model, symbol, date range and costs, as
+# (etag, body, gzipped body or None)
+plot_cache = LRUCache(
+    int(os.environ.get("PLOT_CACHE_MAX_BYTES", 32 * 1024 * 1024)),
+    sizeof=lambda entry: len(entry[1]) + len(entry[2] or b""),
+)
+
+# Limits for /api/sweep requests
+SWEEP_MAX_COMBINATIONS = int(os.environ.get("SWEEP_MAX_COMBINATIONS", 1000))
+SWEEP_MAX_WORKERS = int(os.environ.get("SWEEP_MAX_WORKERS", os.cpu_count() or 1))
+
+# Worker processes for /api/universe backtests and walk-forward windows
+UNIVERSE_MAX_WORKERS = int(os.environ.get("UNIVERSE_MAX_WORKERS", os.cpu_count() or 1))
+
+# Bounded pool running training jobs off the event loop
+job_executor = JobExecutor(max_workers=int(os.environ.get("TRAIN_MAX_WORKERS", 2)))
+
+
+def collect_service_metrics():
+    """Scrape-time gauges read from the job executor, registry and price store."""
+    counts = {status: 0 for status in (QUEUED, RUNNING)}
+    for job in job_executor.list():
+        if job.status in counts:
+            counts[job.status] += 1
+    return [
+        (
+            "trading_jobs",
+            "gauge",
+            "Background jobs by status.",
+            [({"status": status}, count) for status, count in counts.items()],
+        ),
+        (
+            "trading_models_on_disk",
+            "gauge",
+            "Trained models persisted in the model store.",
+            [({}, model_registry.stats()["on_disk"])],
+        ),
+        (
+            "trading_price_symbols_loaded",
+            "gauge",
+            "Symbols memory-mapped by the price store.",
+            [({}, get_price_store().stats()["loaded"])],
+        ),
+    ]
+
+
+registry.add_collector(cache_collector("indicator", indicator_cache))
+registry.add_collector(cache_collector("plot", plot_cache))
+registry.add_collector(cache_collector("model", model_registry))
+registry.add_collector(collect_service_metrics)
 
 app = FastAPI(
     title="Trading Strategy API",
@@ -33,6 +128,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Point-Count"],
 )
 
 
@@ -56,6 +152,10 @@ class QLearningConfig(BaseTradingConfig):
     rar: float = 0.98
     radr: float = 0.999
     dyna: int = 0
+    max_epochs: int = 500  # Hard cap on training epochs
+    max_seconds: Optional[float] = None  # Wall-clock budget for training epochs
+    patience: Optional[int] = None  # Epochs without improvement before stopping
+    tolerance: float = 0.001  # Cumulative return change counted as converged
 
 
 class DecisionTreeConfig(BaseTradingConfig):
@@ -66,6 +166,8 @@ class DecisionTreeConfig(BaseTradingConfig):
     y_sell: float = -0.008
     leaf_size: int = 6
     num_bags: int = 10
+    n_jobs: int = 1
+    seed: Optional[int] = None
 
 
 class ModelConfig(BaseModel):
@@ -75,6 +177,51 @@ class ModelConfig(BaseModel):
     qlearning_config: Optional[QLearningConfig] = None
     decision_tree_config: Optional[DecisionTreeConfig] = None
     indicators_with_params: Optional[dict] = None  # New field for indicator configs
+    model_key: Optional[str] = None  # Registry key returned by a training job
+    retrain: bool = False  # Train even if the same configuration is already stored
+
+
+class SweepConfig(BaseModel):
+    """Parameter grid evaluated over a training and a test period"""
+
+    model_type: str
+    qlearning_config: Optional[QLearningConfig] = None
+    decision_tree_config: Optional[DecisionTreeConfig] = None
+    indicators_with_params: Optional[dict] = None
+    param_grid: Dict[str, List[Any]]  # Model parameter name to candidate values
+    test_start_date: datetime
+    test_end_date: datetime
+    rank_by: str = "cum_return"
+    max_workers: Optional[int] = None
+    seed: Optional[int] = None  # Reseeds the random generators per combination
+
+
+class UniverseConfig(ModelConfig):
+    """Backtest of one strategy over many symbols"""
+
+    test_start_date: datetime
+    test_end_date: datetime
+    # Train a new model per symbol with the given config instead of testing one
+    # trained model everywhere; the config's symbol is then ignored
+    train_per_symbol: bool = False
+    symbols: Optional[List[str]] = None  # Defaults to every symbol in backend/data
+    max_workers: Optional[int] = None
+    seed: Optional[int] = None
+
+
+class WalkForwardConfig(BaseModel):
+    """Rolling train/test evaluation over the config's full date range"""
+
+    model_type: str
+    qlearning_config: Optional[QLearningConfig] = None
+    decision_tree_config: Optional[DecisionTreeConfig] = None
+    indicators_with_params: Optional[dict] = None
+    train_days: int = 252  # Trading days per training window
+    test_days: int = 63  # Trading days per test window
+    step_days: Optional[int] = None  # Defaults to test_days
+    anchored: bool = False  # Expanding instead of rolling training windows
+    max_workers: Optional[int] = None
+    seed: Optional[int] = None
 
 
 class ModelResponse(BaseModel):
@@ -93,135 +240,400 @@ async def root():
     }
 
 
-@app.post("/api/train")
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Return stage timings, cache counters and job gauges in the Prometheus text
+    format. Stage timings are empty when ``METRICS_ENABLED=0``.
+    """
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.post("/api/train", status_code=202)
 async def train_model(config: ModelConfig):
+    """
+    Queue a training job and return its ID immediately.
+
+    Poll ``/api/jobs/{job_id}`` for progress and ``/api/jobs/{job_id}/result``
+    for the outcome.
+    """
     try:
         model, base_config = get_model_and_config(config)
-        # Train the model
-        model.train_model(
-            symbol=base_config.symbol,
-            sd=base_config.start_date,
-            ed=base_config.end_date,
-            sv=base_config.start_val,
-            indicators_with_params=config.indicators_with_params,
+        job = job_executor.submit(
+            run_training_job,
+            model,
+            base_config,
+            config,
+            description=f"Train {config.model_type} on {base_config.symbol}",
         )
-        # Store the trained model
-        trained_models[config.model_type] = model
-        return {"message": f"Successfully trained {config.model_type}"}
+        return {
+            "job_id": job.job_id,
+            "status": job.status,
+            "message": f"Training {config.model_type} queued",
+        }
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         handle_api_exception(e, "/api/train")
         return None
 
 
+@app.get("/api/jobs")
+async def list_jobs():
+    """Return the state of all queued, running and recently finished jobs."""
+    return {"jobs": [job.to_dict() for job in job_executor.list()]}
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Return the status and progress of a job."""
+    return get_job_or_404(job_id).to_dict()
+
+
+@app.get("/api/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """
+    Return the result of a finished job.
+
+    Responds with 202 while the job is still queued or running, 409 if it was
+    cancelled and 500 if it failed.
+    """
+    job = get_job_or_404(job_id)
+    if job.status == SUCCEEDED:
+        return {"job_id": job.job_id, "status": job.status, "result": job.result}
+    if job.status == FAILED:
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.status == CANCELLED:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} was cancelled")
+    return JSONResponse(status_code=202, content=job.to_dict())
+
+
+@app.delete("/api/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Request cancellation of a queued or running job."""
+    get_job_or_404(job_id)
+    return job_executor.cancel(job_id).to_dict()
+
+
+async def refresh_symbol_catalog(catalog):
+    """Rescan the data directory in the threadpool every refresh interval."""
+    while True:
+        await asyncio.sleep(catalog.refresh_seconds)
+        try:
+            await run_in_threadpool(catalog.maybe_refresh)
+        except Exception:
+            logging.exception("Symbol catalog refresh failed")
+
+
+@app.on_event("startup")
+async def build_symbol_catalog():
+    # Index every symbol before the first request instead of on demand; handlers
+    # only read the catalog's snapshot, rescans happen in the background
+    catalog = await run_in_threadpool(get_symbol_catalog)
+    app.state.catalog_refresh = asyncio.create_task(refresh_symbol_catalog(catalog))
+
+
+@app.on_event("shutdown")
+def shutdown_jobs():
+    job_executor.shutdown(wait=False)
+
+
+@app.on_event("shutdown")
+def stop_symbol_catalog_refresh():
+    task = getattr(app.state, "catalog_refresh", None)
+    if task is not None:
+        task.cancel()
+
+
 @app.post("/api/test")
-async def test_model(config: ModelConfig):
+async def test_model(
+    config: ModelConfig, accept_encoding: Optional[str] = Header(None)
+):
+    """
+    Return the model's daily trades as columns, with the key of the model used:
+    ``{"model_key", "symbol", "dates", "trades"}``.
+
+    Large bodies are gzip-compressed when the client accepts it.
+    """
     try:
-        if config.model_type not in trained_models:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Model {config.model_type} has not been trained yet",
-            )
-        model = trained_models[config.model_type]
+        model_key, model = get_trained_model(config)
         # Test the model
         base_config = (
             config.qlearning_config
             if config.model_type == "QLearningTrader"
             else config.decision_tree_config
         )
-        trades = model.test_model(
+        trades = await run_in_threadpool(
+            model.test_model,
             symbol=base_config.symbol,
             sd=base_config.start_date,
             ed=base_config.end_date,
         )
-        return trades
+        with stage_timer("serialize.test", rows=trades.shape[0]):
+            body = encode_json(
+                {
+                    "model_key": model_key,
+                    "symbol": base_config.symbol,
+                    "dates": iso_dates(trades.index),
+                    "trades": np.ascontiguousarray(
+                        trades[base_config.symbol].to_numpy()
+                    ),
+                }
+            )
+        return json_response(body, accept_encoding)
     except Exception as e:
         handle_api_exception(e, "/api/test")
         return None
 
 
 @app.post("/api/plot")
-async def plot_model(config: ModelConfig):
+async def plot_model(
+    config: ModelConfig,
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+):
+    """
+    Return normalized model and benchmark portfolio values for plotting.
+
+    Responses are cached by (model, symbol, date range, costs), together with their
+    gzip-compressed body, and carry an ETag; a matching If-None-Match header gets an
+    empty 304 response.
+    """
     try:
-        # Get model trades using test_model endpoint
-        trades_model = await test_model(config)
+        model_key, model = get_trained_model(config)
         # Get the base config values
         base_config = (
             config.qlearning_config
             if config.model_type == "QLearningTrader"
             else config.decision_tree_config
         )
-        # Get benchmark trades
-        trades_benchmark = trades_model.copy()
-        trades_benchmark.iloc[:, :] = 0.0
-        trades_benchmark.iloc[0, 0] = 1000
-        # Compute portfolio value
-        portvals_benchmark = compute_portvals(
-            trades_benchmark,
-            start_val=base_config.start_val,
-            commission=base_config.commission,
-            impact=base_config.impact,
-            symbol=base_config.symbol,
+        cache_key = (
+            model_key,
+            model_registry.version(model_key),
+            base_config.symbol,
+            base_config.start_date.isoformat(),
+            base_config.end_date.isoformat(),
+            base_config.start_val,
+            base_config.commission,
+            base_config.impact,
         )
-        portvals_benchmark_normalized = portvals_benchmark / portvals_benchmark.iloc[0]
-
-        portvals_model = compute_portvals(
-            trades_model,
-            start_val=base_config.start_val,
-            commission=base_config.commission,
-            impact=base_config.impact,
-            symbol=base_config.symbol,
+        entry = plot_cache.get(cache_key)
+        if entry is None:
+            plot_data = await run_in_threadpool(build_plot_data, model, base_config)
+            with stage_timer("serialize.plot", rows=plot_data["dates"].shape[0]):
+                body = encode_json(plot_data)
+                entry = (f'"{hashlib.sha1(body).hexdigest()}"', body, compress(body))
+            plot_cache.put(cache_key, entry)
+        etag, body, gzipped = entry
+        if etag_matches(if_none_match, etag):
+            return Response(
+                status_code=304, headers={"ETag": etag, "Vary": "Accept-Encoding"}
+            )
+        return json_response(
+            body, accept_encoding, gzipped=gzipped, headers={"ETag": etag}
         )
-        portvals_model_normalized = portvals_model / portvals_model.iloc[0]
-
-        # Convert trades to plot data
-        plot_data = {
-            "dates": trades_model.index.tolist(),
-            "model_values": portvals_model_normalized[
-                portvals_model_normalized.columns[0]
-            ].tolist(),
-            "benchmark_values": portvals_benchmark_normalized[
-                portvals_benchmark_normalized.columns[0]
-            ].tolist(),
-            "symbol": base_config.symbol,
-        }
-        return plot_data
     except Exception as e:
         handle_api_exception(e, "/api/plot")
         return None
 
 
+@app.post("/api/sweep")
+async def sweep_model(config: SweepConfig):
+    """
+    Train and test every combination of a parameter grid in parallel.
+
+    Streams newline-delimited JSON events: one per finished combination with its
+    test period metrics and current rank, then the complete ranked table.
+    """
+    try:
+        context, combinations = await run_in_threadpool(prepare_sweep, config)
+    except Exception as e:
+        handle_api_exception(e, "/api/sweep")
+        return None
+    max_workers = min(config.max_workers or SWEEP_MAX_WORKERS, SWEEP_MAX_WORKERS)
+    events = ranked_sweep(
+        context, combinations, rank_by=config.rank_by, max_workers=max_workers
+    )
+    return StreamingResponse(
+        (json.dumps(event) + "\n" for event in events),
+        media_type="application/x-ndjson",
+    )
+
+
+@app.post("/api/universe")
+async def universe_backtest(config: UniverseConfig):
+    """
+    Backtest a trained model, or a per-symbol training recipe, across many symbols.
+
+    Streams newline-delimited JSON events: one per finished symbol with its test
+    period metrics, then summary statistics over the whole universe.
+    """
+    try:
+        context, symbols = await run_in_threadpool(prepare_universe, config)
+    except Exception as e:
+        handle_api_exception(e, "/api/universe")
+        return None
+    max_workers = min(config.max_workers or UNIVERSE_MAX_WORKERS, UNIVERSE_MAX_WORKERS)
+    events = universe_events(context, symbols, max_workers=max_workers)
+    return StreamingResponse(
+        (json.dumps(event) + "\n" for event in events),
+        media_type="application/x-ndjson",
+    )
+
+
+@app.post("/api/walk-forward")
+async def walk_forward_model(config: WalkForwardConfig):
+    """
+    Run a walk-forward evaluation and return the stitched out-of-sample curve.
+
+    Windows are fitted concurrently in worker processes; prices and indicators are
+    computed once over the full date range and sliced per window.
+    """
+    try:
+        return await run_in_threadpool(run_walk_forward, config)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        handle_api_exception(e, "/api/walk-forward")
+        return None
+
+
+@app.websocket("/api/live")
+async def live_signals(
+    websocket: WebSocket,
+    model_key: Optional[str] = None,
+):
+    """
+    Stream trading signals for a trained model, one session per connection.
+
+    Select the model with the ``model_key`` returned by its training job. Send
+    ``{"price": p}`` or ``{"prices": [...]}`` messages (history first, to warm up
+    the indicators); each is answered with the signal, trade and position of every
+    bar it contained.
+    """
+    # A model spilled from memory is loaded from disk, off the event loop
+    model = (
+        await run_in_threadpool(model_registry.get, model_key) if model_key else None
+    )
+    await websocket.accept()
+    if model is None:
+        detail = "model_key is required" if not model_key else "Model not found"
+        await websocket.send_json({"event": "error", "detail": detail})
+        await websocket.close(code=1008)
+        return
+    session = LiveSession(model)
+    await websocket.send_json({"event": "ready", "model_key": model_key})
+    try:
+        while True:
+            text = await websocket.receive_text()
+            try:
+                message = json.loads(text)
+                if "prices" in message:
+                    results = session.update_many(message["prices"])
+                else:
+                    results = [session.update(message["price"])]
+            except (KeyError, TypeError, ValueError) as e:
+                await websocket.send_json(
+                    {"event": "error", "detail": f"Invalid message: {e}"}
+                )
+                continue
+            await websocket.send_json({"event": "signals", "results": results})
+    except WebSocketDisconnect:
+        pass
+
+
 @app.get("/api/symbols")
-async def get_symbols():
+async def get_symbols(details: bool = False):
     """
     Return a sorted list of all available stock symbols (from CSV files in data/).
+
+    With ``details=true``, also return each symbol's date range, row count, file
+    size and modification time.
     """
     try:
-        data_dir = os.path.join(os.path.dirname(__file__), "..", "data")
-        csv_files = glob.glob(os.path.join(data_dir, "**", "*.csv"), recursive=True)
-        symbols = sorted({os.path.splitext(os.path.basename(f))[0] for f in csv_files})
-        return {"symbols": symbols}
+        catalog = get_symbol_catalog()
+        response = {"symbols": catalog.symbols()}
+        if details:
+            response["details"] = [entry.to_dict() for entry in catalog.entries()]
+        return response
     except Exception as e:
         handle_api_exception(e, "/api/symbols")
         return None
 
 
 @app.get("/api/price")
-async def get_price_data(symbol: str, start_date: str, end_date: str):
+async def get_price_data(
+    symbol: str,
+    start_date: str,
+    end_date: str,
+    max_points: Optional[int] = None,
+    downsample: str = "lttb",
+    format: str = "json",
+):
     """
     Return price data for a specified symbol and date range.
+
+    Unknown symbols and ranges outside the symbol's data are rejected from the
+    symbol catalog without touching the price files. With ``max_points``, the
+    series is downsampled to at most that many points with ``lttb`` or
+    ``minmax``. ``format=binary`` returns little-endian float64 closing prices
+    followed by int32 days since 1970-01-01, with the point count in the
+    ``X-Point-Count`` header.
     """
     try:
-        data_dir = os.path.join(os.path.dirname(__file__), "..", "data")
-        file_path = os.path.join(data_dir, f"{symbol}.csv")
-        if not os.path.exists(file_path):
+        if max_points is not None and max_points < 4:
+            raise HTTPException(status_code=400, detail="max_points must be at least 4")
+        if downsample not in DOWNSAMPLE_METHODS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"downsample must be one of {', '.join(DOWNSAMPLE_METHODS)}",
+            )
+        if format not in ("json", "binary"):
+            raise HTTPException(
+                status_code=400, detail="format must be 'json' or 'binary'"
+            )
+        entry = get_symbol_catalog().get(symbol)
+        if entry is None:
             raise HTTPException(status_code=404, detail=f"Symbol {symbol} not found")
-        df = pd.read_csv(file_path)
-        df["Date"] = pd.to_datetime(df["Date"])
-        mask = (df["Date"] >= start_date) & (df["Date"] <= end_date)
-        filtered_df = df.loc[mask].sort_values("Date")
+        try:
+            start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid date: {e}")
+        if start > end:
+            raise HTTPException(
+                status_code=400, detail="start_date must not be after end_date"
+            )
+        if not entry.overlaps(start, end):
+            first, last = entry.to_dict()["first_date"], entry.to_dict()["last_date"]
+            raise HTTPException(
+                status_code=404,
+                detail=f"No {symbol} prices between {start_date} and {end_date}; "
+                f"data covers {first} to {last}",
+            )
+        prices = get_price_store().load(symbol)
+        lo, hi = prices.locate(start_date, end_date)
+        days = prices.dates[lo:hi].astype("datetime64[D]").astype(np.int32)
+        closes = prices.column("Close")[lo:hi]
+        if max_points is not None and closes.shape[0] > max_points:
+            keep = downsample_indices(days, closes, max_points, method=downsample)
+            days, closes = days[keep], closes[keep]
+        if format == "binary":
+            body = np.ascontiguousarray(closes, dtype="<f8").tobytes()
+            body += np.ascontiguousarray(days, dtype="<i4").tobytes()
+            return Response(
+                content=body,
+                media_type="application/octet-stream",
+                headers={"X-Point-Count": str(days.shape[0])},
+            )
         return {
-            "dates": filtered_df["Date"].dt.strftime("%Y-%m-%d").tolist(),
-            "prices": filtered_df["Close"].tolist(),
+            "dates": np.datetime_as_string(
+                days.astype("datetime64[D]"), unit="D"
+            ).tolist(),
+            "prices": closes.tolist(),
         }
     except Exception as e:
         handle_api_exception(e, "/api/price")
@@ -245,6 +657,10 @@ def get_model_and_config(config: ModelConfig):
             rar=base_config.rar,
             radr=base_config.radr,
             dyna=base_config.dyna,
+            max_epochs=base_config.max_epochs,
+            max_seconds=base_config.max_seconds,
+            patience=base_config.patience,
+            tolerance=base_config.tolerance,
         )
     elif config.model_type == "RandomForestTrader":
         if not config.decision_tree_config:
@@ -260,13 +676,301 @@ def get_model_and_config(config: ModelConfig):
             y_sell=base_config.y_sell,
             leaf_size=base_config.leaf_size,
             num_bags=base_config.num_bags,
+            n_jobs=base_config.n_jobs,
+            seed=base_config.seed,
         )
     else:
         raise HTTPException(status_code=400, detail="Invalid model type")
     return model, base_config
 
 
+# Trading config fields that are not model constructor arguments
+NON_MODEL_FIELDS = {"symbol", "start_date", "end_date", "start_val"}
+
+
+def prepare_sweep(config: SweepConfig):
+    """
+    Validate a sweep request and load its prices and indicators once.
+
+    Returns a (SweepContext, combinations) tuple.
+    """
+    _, base_config = get_model_and_config(config)
+    if config.rank_by not in RANK_METRICS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"rank_by must be one of {', '.join(RANK_METRICS)}",
+        )
+    # Workers each fit one model; nested process pools would oversubscribe
+    tunable = set(type(base_config).model_fields) - NON_MODEL_FIELDS - {"n_jobs"}
+    unknown = sorted(set(config.param_grid) - tunable)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown {config.model_type} parameters: {', '.join(unknown)}",
+        )
+    if any(len(values) == 0 for values in config.param_grid.values()):
+        raise HTTPException(status_code=400, detail="Grid values must not be empty")
+    n_combinations = int(np.prod([len(v) for v in config.param_grid.values()]))
+    if n_combinations > SWEEP_MAX_COMBINATIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{n_combinations} combinations exceed the limit of "
+            f"{SWEEP_MAX_COMBINATIONS}",
+        )
+    # Validate and coerce every combination through the config model
+    combinations = []
+    for params in expand_grid(config.param_grid):
+        try:
+            checked = type(base_config)(**dict(base_config.model_dump(), **params))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        combinations.append({name: getattr(checked, name) for name in params})
+
+    base_kwargs = base_config.model_dump(exclude=NON_MODEL_FIELDS)
+    if "n_jobs" in base_kwargs:
+        base_kwargs["n_jobs"] = 1
+    indicators_with_params = coerce_indicator_params(
+        config.indicators_with_params or DEFAULT_INDICATORS
+    )
+    prices_train = process_data(
+        base_config.symbol,
+        pd.date_range(base_config.start_date, base_config.end_date),
+    )
+    prices_test = process_data(
+        base_config.symbol, pd.date_range(config.test_start_date, config.test_end_date)
+    )
+    context = SweepContext(
+        MODEL_CLASSES[config.model_type],
+        base_kwargs,
+        base_config.symbol,
+        prices_train,
+        prices_test,
+        indicators_with_params,
+        start_val=base_config.start_val,
+        seed=config.seed,
+        indicator_entries=precompute_indicators(
+            [prices_train, prices_test], indicators_with_params
+        ),
+    )
+    return context, combinations
+
+
+def prepare_universe(config: UniverseConfig):
+    """
+    Validate a universe backtest request and resolve its symbols and strategy.
+
+    Returns a (UniverseContext, symbols) tuple.
+    """
+    _, base_config = get_model_and_config(config)
+    store = get_price_store()
+    available = set(store.symbols())
+    if config.symbols is None:
+        symbols = sorted(available)
+    else:
+        unknown = sorted(set(config.symbols) - available)
+        if unknown:
+            raise HTTPException(
+                status_code=404, detail=f"Symbols not found: {', '.join(unknown)}"
+            )
+        symbols = list(dict.fromkeys(config.symbols))
+    context_kwargs = dict(
+        test_dates=(config.test_start_date, config.test_end_date),
+        start_val=base_config.start_val,
+        commission=base_config.commission,
+        impact=base_config.impact,
+        seed=config.seed,
+    )
+    if config.train_per_symbol:
+        model_kwargs = base_config.model_dump(exclude=NON_MODEL_FIELDS)
+        if "n_jobs" in model_kwargs:
+            # Symbols already run in parallel worker processes
+            model_kwargs["n_jobs"] = 1
+        context = UniverseContext(
+            MODEL_CLASSES[config.model_type],
+            model_kwargs=model_kwargs,
+            train_dates=(base_config.start_date, base_config.end_date),
+            indicators_with_params=config.indicators_with_params or DEFAULT_INDICATORS,
+            **context_kwargs,
+        )
+    else:
+        _, model = get_trained_model(config)
+        context = UniverseContext(
+            type(model),
+            model_state=model.get_state(),
+            **context_kwargs,
+        )
+    return context, symbols
+
+
+def run_walk_forward(config: WalkForwardConfig):
+    _, base_config = get_model_and_config(config)
+    model_kwargs = base_config.model_dump(exclude=NON_MODEL_FIELDS)
+    if "n_jobs" in model_kwargs:
+        # Windows already run in parallel worker processes
+        model_kwargs["n_jobs"] = 1
+    prices = process_data(
+        base_config.symbol,
+        pd.date_range(base_config.start_date, base_config.end_date),
+    )
+    windows = generate_windows(
+        prices.shape[0],
+        config.train_days,
+        config.test_days,
+        step_days=config.step_days,
+        anchored=config.anchored,
+    )
+    context = WalkForwardContext(
+        MODEL_CLASSES[config.model_type],
+        model_kwargs,
+        base_config.symbol,
+        prices,
+        coerce_indicator_params(config.indicators_with_params or DEFAULT_INDICATORS),
+        start_val=base_config.start_val,
+        seed=config.seed,
+    )
+    max_workers = min(config.max_workers or UNIVERSE_MAX_WORKERS, UNIVERSE_MAX_WORKERS)
+    result = walk_forward(
+        context,
+        windows,
+        commission=base_config.commission,
+        impact=base_config.impact,
+        max_workers=max_workers,
+    )
+    result["symbol"] = base_config.symbol
+    return result
+
+
+def run_training_job(job, model, base_config, config):
+    model_key = get_model_key(config)
+    if not config.retrain:
+        if model_registry.get(model_key) is not None:
+            return {
+                "message": f"Reused trained {config.model_type}",
+                "model_key": model_key,
+            }
+    with stage_timer(f"train.{config.model_type}"):
+        training_stats = model.train_model(
+            symbol=base_config.symbol,
+            sd=base_config.start_date,
+            ed=base_config.end_date,
+            sv=base_config.start_val,
+            indicators_with_params=config.indicators_with_params,
+            progress_callback=job.report,
+        )
+    # Store the trained model
+    model_registry.put(model_key, model)
+    result = {
+        "message": f"Successfully trained {config.model_type}",
+        "model_key": model_key,
+    }
+    if training_stats is not None:
+        result["training_stats"] = training_stats
+    return result
+
+
+def get_model_key(config: ModelConfig):
+    """Registry key built from the model type, trading config and indicators."""
+    base_config = (
+        config.qlearning_config
+        if config.model_type == "QLearningTrader"
+        else config.decision_tree_config
+    )
+    return config_key(
+        {
+            "model_type": config.model_type,
+            # Worker count does not change the trained model
+            "config": base_config.model_dump(exclude={"n_jobs"}),
+            "indicators_with_params": config.indicators_with_params,
+        }
+    )
+
+
+def get_trained_model(config: ModelConfig):
+    """
+    Find the model to test: an explicit model_key, else a model trained with this
+    exact configuration. Returns a (model_key, model) tuple.
+
+    There is deliberately no fallback to another stored model, so a request never
+    evaluates a model trained by someone else for a different configuration.
+    """
+    if config.model_key is not None:
+        model = model_registry.get(config.model_key)
+        if model is None:
+            raise HTTPException(
+                status_code=404, detail=f"Model {config.model_key} not found"
+            )
+        return config.model_key, model
+    model_key = get_model_key(config)
+    model = model_registry.get(model_key)
+    if model is None:
+        raise HTTPException(
+            status_code=404,
+            detail=(
+                f"No trained {config.model_type} matches this configuration; "
+                "pass the model_key returned by the training job"
+            ),
+        )
+    return model_key, model
+
+
+def build_plot_data(model, base_config):
+    """
+    Test a model and value its trades next to the buy-and-hold benchmark.
+
+    Prices are loaded once and shared by the model test and the portfolio
+    simulation; both value series come from one batched evaluation.
+    """
+    prices = process_data(
+        base_config.symbol,
+        pd.date_range(base_config.start_date, base_config.end_date),
+    )
+    with stage_timer(f"test.{type(model).__name__}", rows=prices.shape[0]):
+        trades_model = model.test_model(
+            symbol=base_config.symbol,
+            sd=base_config.start_date,
+            ed=base_config.end_date,
+            prices=prices,
+        )
+    simulator = PortfolioSimulator(
+        prices[base_config.symbol],
+        start_val=base_config.start_val,
+        commission=base_config.commission,
+        impact=base_config.impact,
+    )
+    # Benchmark: buy 1000 shares on the first day and hold
+    trades_benchmark = np.zeros(prices.shape[0])
+    trades_benchmark[0] = 1000
+    portvals = simulator.evaluate(
+        np.vstack([trades_model[base_config.symbol].to_numpy(), trades_benchmark])
+    )
+    portvals_normalized = portvals / portvals[:, :1]
+    return {
+        "dates": iso_dates(prices.index),
+        "model_values": portvals_normalized[0],
+        "benchmark_values": portvals_normalized[1],
+        "symbol": base_config.symbol,
+    }
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(
+        tag == etag or tag == f"W/{etag}" for tag in candidates
+    )
+
+
+def get_job_or_404(job_id):
+    job = job_executor.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+
 def handle_api_exception(e, endpoint_name):
+    if isinstance(e, HTTPException):
+        raise e
     print(f"EXCEPTION in {endpoint_name}:", e, flush=True)
     traceback.print_exc()
     raise HTTPException(status_code=500, detail=str(e))
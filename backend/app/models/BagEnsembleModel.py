@@ -1,5 +1,8 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
 import numpy as np
-from scipy import stats
 
 
 class BagEnsembleModel(object):
@@ -15,12 +18,31 @@ class BagEnsembleModel(object):
         Keyword arguments to be passed to the base model constructor
     bags : int, optional
         Number of models in the ensemble, defaults to 20
+    n_jobs : int, optional
+        Number of worker processes used to train bags, defaults to 1 (in-process).
+        Use -1 for one worker per CPU core
+    seed : int, optional
+        Seed for per-bag random streams. When set (or when n_jobs != 1), every bag
+        draws its bootstrap sample and random choices from its own stream spawned
+        from this seed, so results do not depend on the worker count. When None
+        and n_jobs == 1, the global NumPy RNG is used as before
     """
 
-    def __init__(self, model, kwargs={"argument1": 1, "argument2": 2}, bags=20):
+    def __init__(
+        self,
+        model,
+        kwargs={"argument1": 1, "argument2": 2},
+        bags=20,
+        n_jobs=1,
+        seed=None,
+    ):
         """
         Initialize the bagging ensemble model.
         """
+        self.model = model
+        self.kwargs = kwargs
+        self.n_jobs = n_jobs
+        self.seed = seed
         self.models = []
         for i in range(0, bags):
             self.models.append(model(**kwargs))
@@ -36,11 +58,43 @@ class BagEnsembleModel(object):
         data_y : numpy.ndarray
             Target values to predict
         """
-        for model in self.models:
-            index_random = np.random.randint(
-                low=0, high=data_x.shape[0], size=data_x.shape[0]
-            )
-            model.add_evidence(data_x[index_random], data_y[index_random])
+        if self.n_jobs == 1 and self.seed is None:
+            for model in self.models:
+                index_random = np.random.randint(
+                    low=0, high=data_x.shape[0], size=data_x.shape[0]
+                )
+                model.add_evidence(data_x[index_random], data_y[index_random])
+            return
+
+        bag_seeds = np.random.SeedSequence(self.seed).spawn(len(self.models))
+        n_workers = os.cpu_count() if self.n_jobs == -1 else self.n_jobs
+        n_workers = max(1, min(n_workers or 1, len(self.models)))
+        if n_workers == 1:
+            self.models = [
+                _fit_bag(model, data_x, data_y, bag_seed)
+                for model, bag_seed in zip(self.models, bag_seeds)
+            ]
+            return
+
+        # Place the training data in shared memory once instead of pickling it
+        # into every task
+        shared = [_SharedArray.create(data_x), _SharedArray.create(data_y)]
+        try:
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                futures = [
+                    executor.submit(
+                        _fit_bag_shared,
+                        model,
+                        shared[0].spec,
+                        shared[1].spec,
+                        bag_seed,
+                    )
+                    for model, bag_seed in zip(self.models, bag_seeds)
+                ]
+                self.models = [future.result() for future in futures]
+        finally:
+            for block in shared:
+                block.release(unlink=True)
 
     def query(self, points):
         """
@@ -57,7 +111,61 @@ class BagEnsembleModel(object):
             Predicted values for each input point, determined by majority voting
             across all models in the ensemble
         """
-        ret = []
-        for model in self.models:
-            ret.append(model.query(points))
-        return stats.mode(ret).mode
+        ret = np.vstack([model.query(points) for model in self.models])
+        # Majority vote per point; ties go to the smallest value, as with stats.mode
+        labels, inverse = np.unique(ret, return_inverse=True)
+        n_points = ret.shape[1]
+        flat = inverse.reshape(ret.shape) * n_points + np.arange(n_points)
+        votes = np.bincount(flat.ravel(), minlength=labels.shape[0] * n_points)
+        return labels[np.argmax(votes.reshape(labels.shape[0], n_points), axis=0)]
+
+
+def _fit_bag(model, data_x, data_y, bag_seed):
+    rng = np.random.default_rng(bag_seed)
+    index_random = rng.integers(low=0, high=data_x.shape[0], size=data_x.shape[0])
+    model.add_evidence(data_x[index_random], data_y[index_random], rng=rng)
+    return model
+
+
+def _fit_bag_shared(model, x_spec, y_spec, bag_seed):
+    shared_x = _SharedArray.attach(x_spec)
+    shared_y = _SharedArray.attach(y_spec)
+    try:
+        return _fit_bag(model, shared_x.array, shared_y.array, bag_seed)
+    finally:
+        shared_x.release()
+        shared_y.release()
+
+
+class _SharedArray(object):
+    """A NumPy array backed by a named shared memory block."""
+
+    def __init__(self, shm, shape, dtype):
+        self.shm = shm
+        self.array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        self.spec = (shm.name, shape, np.dtype(dtype).str)
+
+    @classmethod
+    def create(cls, arr):
+        arr = np.ascontiguousarray(arr)
+        shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        block = cls(shm, arr.shape, arr.dtype)
+        block.array[...] = arr
+        return block
+
+    @classmethod
+    def attach(cls, spec):
+        name, shape, dtype = spec
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python < 3.13 has no track flag; pool workers share the parent's
+            # resource tracker, which already holds this block
+            shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, shape, dtype)
+
+    def release(self, unlink=False):
+        self.array = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
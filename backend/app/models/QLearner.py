@@ -1,7 +1,60 @@
 import random as rand
+from collections import OrderedDict
+
 import numpy as np
 
 
+class ReplayMemory(object):
+    """
+    Fixed-capacity ring buffer of experienced transitions (s, a, s', r).
+
+    Once full, each new transition overwrites the oldest one, so memory stays
+    bounded however long training runs.
+
+    :param capacity: Maximum number of transitions kept.
+    :type capacity: int
+    """
+
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise ValueError("Replay memory capacity must be at least 1")
+        self.capacity = capacity
+        self.s = np.zeros(capacity, dtype=np.int64)
+        self.a = np.zeros(capacity, dtype=np.int64)
+        self.s_prime = np.zeros(capacity, dtype=np.int64)
+        self.r = np.zeros(capacity, dtype=np.float64)
+        self.size = 0
+        self.pos = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, s, a, s_prime, r):
+        """
+        Store a transition, evicting the oldest one when full.
+        """
+        pos = self.pos
+        self.s[pos] = s
+        self.a[pos] = a
+        self.s_prime[pos] = s_prime
+        self.r[pos] = r
+        self.pos = pos + 1 if pos + 1 < self.capacity else 0
+        if self.size < self.capacity:
+            self.size += 1
+
+    def sample(self, n):
+        """
+        Draw ``n`` transitions uniformly with replacement.
+
+        :param n: Number of transitions.
+        :type n: int
+        :return: Arrays of states, actions, next states and rewards.
+        :rtype: tuple
+        """
+        index = np.random.randint(self.size, size=n)
+        return self.s[index], self.a[index], self.s_prime[index], self.r[index]
+
+
 class QLearner(object):
     """
     This is a Q learner object.
@@ -20,6 +73,12 @@ class QLearner(object):
     :type radr: float
     :param dyna: The number of dyna updates for each regular update. When Dyna is used, 200 is a typical value.
     :type dyna: int
+    :param memory_size: Maximum number of past transitions kept for Dyna planning; the oldest are evicted first.
+    :type memory_size: int
+    :param max_dense_states: Largest state space stored as a dense table. Larger spaces only keep rows for states that were updated, in a table that grows on demand.
+    :type max_dense_states: int
+    :param max_states: Maximum rows kept for a large state space; once reached, the least recently updated state is forgotten.
+    :type max_states: int
     :param verbose: If “verbose” is True, your code can print out information for debugging.
     :type verbose: bool
     """
@@ -34,6 +93,9 @@ class QLearner(object):
         radr=0.99,
         dyna=0,
         verbose=False,
+        memory_size=50000,
+        max_dense_states=100000,
+        max_states=100000,
     ):
         """
         Constructor method
@@ -47,10 +109,19 @@ class QLearner(object):
         self.gamma = gamma
         self.radr = radr
         self.dyna = dyna
-        self.q_table = np.zeros((num_states, num_actions))
+        self.num_states = num_states
+        self.max_states = max_states
+        if num_states <= max_dense_states:
+            self.state_slots = None
+            self.q_table = np.zeros((num_states, num_actions))
+        else:
+            # Rows of q_table are slots; state_slots maps states to them, least
+            # recently updated first
+            self.state_slots = OrderedDict()
+            self.q_table = np.zeros((min(1024, max_states), num_actions))
 
         if dyna > 0:
-            self.previous = []
+            self.memory = ReplayMemory(memory_size)
 
     def querysetstate(self, s):
         """
@@ -65,7 +136,7 @@ class QLearner(object):
         if rand.uniform(0.0, 1.0) <= self.rar:
             action = rand.randint(0, self.num_actions - 1)
         else:
-            state_actions = self.q_table[s, :]
+            state_actions = self._values(s)
             action = np.argmax(state_actions)
         self.a = action
 
@@ -84,30 +155,17 @@ class QLearner(object):
         :return: The selected action
         :rtype: int
         """
-        self.q_table[self.s, self.a] += self.alpha * (
-            r
-            + self.gamma * self.q_table[s_prime, :].max()
-            - self.q_table[self.s, self.a]
-        )
+        self._update(self.s, self.a, s_prime, r)
 
         if rand.uniform(0.0, 1.0) <= self.rar:
             action = rand.randint(0, self.num_actions - 1)
         else:
-            state_actions = self.q_table[s_prime, :]
+            state_actions = self._values(s_prime)
             action = np.argmax(state_actions)
 
         if self.dyna > 0:
-            self.previous.append((self.s, self.a, s_prime, r))
-            random_index = np.random.randint(len(self.previous), size=self.dyna)
-            for i in range(self.dyna):
-                s_random, a_random, s_prime_dyna, r_dyna = self.previous[
-                    random_index[i]
-                ]
-                self.q_table[s_random, a_random] += self.alpha * (
-                    r_dyna
-                    + self.gamma * self.q_table[s_prime_dyna, :].max()
-                    - self.q_table[s_random, a_random]
-                )
+            self.memory.add(self.s, self.a, s_prime, r)
+            self.plan(self.dyna)
 
         self.s = s_prime
         self.a = action
@@ -116,3 +174,155 @@ class QLearner(object):
         if self.verbose:
             print(f"s = {s_prime}, a = {action}, r={r}")
         return action
+
+    def plan(self, n):
+        """
+        Apply ``n`` Dyna updates replayed from memory
+
+        Each sampled transition gets the usual update
+        ``Q[s, a] += alpha * (r + gamma * max(Q[s', :]) - Q[s, a])``, one at a time
+        in sampling order. The Q-table is read and written in place through a flat
+        memoryview, which avoids the cost of NumPy scalar indexing per update.
+
+        :param n: Number of planning updates
+        :type n: int
+        """
+        s, a, s_prime, r = self.memory.sample(n)
+        if self.state_slots is None:
+            s_rows, s_prime_rows = s.tolist(), s_prime.tolist()
+        else:
+            states = s.tolist()
+            new_states = {state for state in states if state not in self.state_slots}
+            if len(self.state_slots) + len(new_states) > self.max_states:
+                # Recycled slots change which rows later samples read, so updates
+                # that evict are applied one at a time
+                for update in zip(states, a.tolist(), s_prime.tolist(), r.tolist()):
+                    self._update(*update)
+                return
+            # Allocating every slot up front, in sampling order, leaves the same
+            # recency order as sequential updates; new rows stay zero until written
+            s_rows = [self._slot_for_update(state) for state in states]
+            s_prime_rows = [
+                self.state_slots.get(state, -1) for state in s_prime.tolist()
+            ]
+        num_actions, alpha, gamma = self.num_actions, self.alpha, self.gamma
+        with memoryview(self.q_table).cast("B").cast("d") as q:
+            for row, action, next_row, reward in zip(
+                s_rows, a.tolist(), s_prime_rows, r.tolist()
+            ):
+                i = row * num_actions + action
+                if next_row < 0:
+                    # States never updated have no row and read as zeros
+                    next_max = 0.0
+                else:
+                    start = next_row * num_actions
+                    next_max = max(q[start : start + num_actions])
+                q[i] += alpha * (reward + gamma * next_max - q[i])
+
+    def state_values(self, states):
+        """
+        Q-values of several states, zero for states that were never updated
+
+        :param states: States
+        :type states: numpy.ndarray
+        :return: Array of shape (len(states), num_actions)
+        :rtype: numpy.ndarray
+        """
+        if self.state_slots is None:
+            return self.q_table[states]
+        slots = np.fromiter(
+            (self.state_slots.get(state, -1) for state in np.asarray(states).tolist()),
+            np.int64,
+            len(states),
+        )
+        values = self.q_table[np.maximum(slots, 0)]
+        values[slots < 0] = 0.0
+        return values
+
+    def get_table(self):
+        """
+        Export the Q-values as arrays
+
+        :return: ``q_table``, plus ``q_states`` naming the state of each row when
+            the state space is stored sparsely
+        :rtype: dict
+        """
+        if self.state_slots is None:
+            return {"q_table": self.q_table}
+        count = len(self.state_slots)
+        slots = np.fromiter(self.state_slots.values(), np.int64, count)
+        return {
+            "q_table": self.q_table[slots],
+            "q_states": np.fromiter(self.state_slots.keys(), np.int64, count),
+        }
+
+    def set_table(self, arrays):
+        """
+        Restore Q-values exported with ``get_table``
+
+        :param arrays: Output of ``get_table``
+        :type arrays: dict
+        """
+        q_table = np.array(arrays["q_table"], dtype=np.float64)
+        states = arrays.get("q_states")
+        if self.state_slots is None:
+            if states is None:
+                self.q_table = q_table
+            else:
+                self.q_table = np.zeros((self.num_states, self.num_actions))
+                self.q_table[np.asarray(states, dtype=np.int64)] = q_table
+            return
+        if states is None:
+            # A dense table: keep only the rows that hold values
+            states = np.flatnonzero(q_table.any(axis=1))
+            q_table = q_table[states]
+        states = np.asarray(states, dtype=np.int64)[-self.max_states :]
+        q_table = q_table[-self.max_states :]
+        self.q_table = np.zeros(
+            (min(max(1024, states.shape[0]), self.max_states), self.num_actions)
+        )
+        self.q_table[: states.shape[0]] = q_table
+        self.state_slots = OrderedDict(zip(states.tolist(), range(states.shape[0])))
+
+    def _update(self, s, a, s_prime, r):
+        # One Q-learning update of (s, a) towards r + gamma * max(Q[s', :])
+        if self.state_slots is None:
+            self.q_table[s, a] += self.alpha * (
+                r + self.gamma * self.q_table[s_prime, :].max() - self.q_table[s, a]
+            )
+            return
+        next_max = self._values(s_prime).max()
+        slot = self._slot_for_update(s)
+        self.q_table[slot, a] += self.alpha * (
+            r + self.gamma * next_max - self.q_table[slot, a]
+        )
+
+    def _values(self, s):
+        # Q-values of one state, read without allocating a row
+        if self.state_slots is None:
+            return self.q_table[s, :]
+        slot = self.state_slots.get(s, -1)
+        if slot < 0:
+            return np.zeros(self.num_actions)
+        return self.q_table[slot, :]
+
+    def _slot_for_update(self, s):
+        # Row of a state about to be updated, allocating or recycling one if needed
+        slots = self.state_slots
+        slot = slots.get(s)
+        if slot is not None:
+            slots.move_to_end(s)
+            return slot
+        if len(slots) < self.max_states:
+            slot = len(slots)
+            if slot == self.q_table.shape[0]:
+                grown = np.zeros(
+                    (min(2 * slot, self.max_states), self.num_actions), dtype=np.float64
+                )
+                grown[:slot] = self.q_table
+                self.q_table = grown
+        else:
+            _, slot = slots.popitem(last=False)
+            self.q_table[slot] = 0.0
+        slots[s] = slot
+        return slot
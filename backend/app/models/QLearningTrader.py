@@ -1,8 +1,92 @@
 from .QLearner import QLearner as ql
-from ..utils import indicators, utility
+from ..utils import utility
+from ..utils.indicator_cache import compute_indicator
+from ..utils.metrics import observe_epochs, stage_timer
+from ..utils.portfolio import PortfolioSimulator, positions_to_trades
 import numpy as np
 import pandas as pd
 import datetime
+import time
+
+# Position held after taking each action: 0 (Long), 1 (Short), 2 (Cash)
+ACTION_POSITIONS = np.array([1000, -1000, 0])
+# Shares to buy for (action, holding), with holdings indexed like actions
+SHARES_TO_BUY = ACTION_POSITIONS[:, None] - ACTION_POSITIONS[None, :]
+CASH_ACTION = 2
+# Trading signal of each action: 1 (Long), -1 (Short), 0 (Cash)
+ACTION_SIGNALS = np.array([1, -1, 0])
+# Largest state space that can be encoded in an int64
+MAX_ENCODED_STATES = 2**62
+
+
+class StateEncoder(object):
+    """
+    Mixed-radix encoding of per-indicator bin indices into one integer state.
+
+    The first indicator is the most significant digit, so three indicators with
+    10 bins each give the familiar ``100 * d0 + 10 * d1 + d2`` layout.
+
+    Parameters
+    ----------
+    radices : list of int
+        Number of bins of each indicator
+
+    Raises
+    ------
+    ValueError
+        If a radix is below 1 or the state space does not fit in an int64
+    """
+
+    def __init__(self, radices):
+        radices = [int(radix) for radix in radices]
+        if not radices or min(radices) < 1:
+            raise ValueError("Every indicator needs at least one bin")
+        num_states = 1
+        place_values = []
+        for radix in reversed(radices):
+            place_values.append(num_states)
+            num_states *= radix
+        if num_states > MAX_ENCODED_STATES:
+            raise ValueError(
+                f"{len(radices)} indicators with these bin counts give "
+                f"{num_states} states, more than can be encoded"
+            )
+        self.radices = radices
+        self.num_states = num_states
+        self.place_values = np.array(place_values[::-1], dtype=np.int64)
+
+    def encode(self, digits):
+        """
+        Encode bin indices into states.
+
+        Parameters
+        ----------
+        digits : numpy.ndarray
+            Integer bin indices of shape (rows, indicators)
+
+        Returns
+        -------
+        numpy.ndarray
+            int64 state per row
+        """
+        return np.asarray(digits, dtype=np.int64) @ self.place_values
+
+    def decode(self, states):
+        """
+        Split states back into bin indices.
+
+        Parameters
+        ----------
+        states : numpy.ndarray
+            int64 states
+
+        Returns
+        -------
+        numpy.ndarray
+            Bin indices of shape (len(states), indicators)
+        """
+        states = np.asarray(states, dtype=np.int64)
+        return (states[:, None] // self.place_values) % np.array(self.radices)
 
 
 class QLearningTrader(object):
@@ -18,6 +102,10 @@ class QLearningTrader(object):
         rar=0.98,
         radr=0.999,
         dyna=0,
+        max_epochs=500,
+        max_seconds=None,
+        patience=None,
+        tolerance=0.001,
     ):
         """
         Constructor method
@@ -26,23 +114,49 @@ class QLearningTrader(object):
         :type impact: float
         :param commission: The commission amount charged, defaults to 0.0
         :type commission: float
+        :param max_epochs: Upper bound on training epochs, defaults to 500
+        :type max_epochs: int
+        :param max_seconds: Wall-clock budget for the epoch loop, unbounded if None
+        :type max_seconds: float
+        :param patience: Stop after this many epochs without the cumulative return
+            improving on its best value by more than ``tolerance``; disabled if None
+        :type patience: int
+        :param tolerance: Training has converged once the cumulative return changes
+            by no more than this between epochs, defaults to 0.001
+        :type tolerance: float
         """
 
+        if max_epochs < 1:
+            raise ValueError("max_epochs must be at least 1")
         self.scaler_map = {}
         self.impact = impact
         self.commission = commission
         self.learner = None
         self.bins = bins
-        states_amount = (bins - 1) * 111 + 1
-        self.learner = ql(
-            num_states=states_amount,
-            num_actions=3,
-            alpha=alpha,
-            gamma=gamma,
-            rar=rar,
-            radr=radr,
-            dyna=dyna,
-        )
+        self.max_epochs = max_epochs
+        self.max_seconds = max_seconds
+        self.patience = patience
+        self.tolerance = tolerance
+        self.training_stats = None
+        self.learner_params = {
+            "alpha": alpha,
+            "gamma": gamma,
+            "rar": rar,
+            "radr": radr,
+            "dyna": dyna,
+        }
+        # Sized for three indicators until training sees the actual ones
+        self.encoder = StateEncoder([bins] * 3)
+        self.learner = self.make_learner(self.encoder.num_states)
+
+    def make_learner(self, num_states):
+        """
+        Create a fresh Q-learner over ``num_states`` states.
+
+        Large state spaces get a sparse Q-table with a bounded number of rows, see
+        ``QLearner``.
+        """
+        return ql(num_states=num_states, num_actions=3, **self.learner_params)
 
     # Train the model for trading
     def train_model(
@@ -52,6 +166,9 @@ class QLearningTrader(object):
         ed=datetime.datetime(2009, 1, 1),
         sv=100000,
         indicators_with_params=None,
+        progress_callback=None,
+        prices=None,
+        indicators=None,
     ):
         """
         Train the strategy model over a given time frame using user-specified indicators and parameters.
@@ -67,12 +184,30 @@ class QLearningTrader(object):
         sv : int
             The starting value of the portfolio
         indicators_with_params : dict, optional
-            Dictionary mapping indicator names to their parameter dicts. Must specify exactly three indicators. Example:
+            Dictionary mapping indicator names to their parameter dicts; any number of indicators, each binned into ``bins`` buckets of the state. Example:
             {
                 "bbp": {"lookback": 10},
                 "rsi": {"lookback": 10},
                 "macd": {"short_period": 12, "long_period": 26}
             }
+        progress_callback : callable, optional
+            Called after every epoch with keyword arguments ``epoch`` and
+            ``cum_return``. Exceptions it raises abort training.
+        prices : pandas.DataFrame, optional
+            Preloaded output of ``utility.process_data`` for the same symbol and
+            dates; loaded from the price store if None
+        indicators : dict, optional
+            Precomputed raw indicator frames aligned with ``prices``, keyed by
+            indicator name; computed from the prices if None
+
+        Returns
+        -------
+        dict
+            Training statistics: number of epochs, why training stopped (one of
+            ``converged``, ``max_epochs``, ``max_seconds`` or ``patience``), the
+            final cumulative return and per-epoch ``history`` entries with the
+            epoch, cumulative return, random action rate and elapsed seconds.
+            Also kept as ``training_stats``.
         """
 
         if indicators_with_params is None:
@@ -82,36 +217,180 @@ class QLearningTrader(object):
                 "macd": {"short_period": 12, "long_period": 26},
             }
         self.indicators_with_params = indicators_with_params  # Store for later use
-        prices_train = utility.process_data(symbol, pd.date_range(sd, ed))
-        indi_states_df = self.get_indi_states(prices_train, indicators_with_params)
+        self.scaler_map = {}
+        encoder = StateEncoder([self.bins] * len(indicators_with_params))
+        if encoder.num_states != self.learner.num_states:
+            self.encoder = encoder
+            self.learner = self.make_learner(encoder.num_states)
+        prices_train = prices
+        if prices_train is None:
+            prices_train = utility.process_data(symbol, pd.date_range(sd, ed))
+        indi_states_df = self.get_indi_states(
+            prices_train, indicators_with_params, indicators=indicators
+        )
+
+        prices_arr = prices_train.iloc[:, 0].to_numpy(dtype=np.float64)
+        states = indi_states_df.iloc[:, 0].to_numpy()
+        rewards = self.reward_table(prices_arr)
+        trades_buf = np.zeros(prices_arr.shape[0], dtype=np.int64)
+        simulator = PortfolioSimulator(
+            prices_arr, start_val=sv, commission=self.commission, impact=self.impact
+        )
 
+        history = []
         last_cum_ret = -100
-        current_cum_ret = 0
-        trades = pd.DataFrame(0, index=prices_train.index, columns=prices_train.columns)
-        while np.abs(current_cum_ret - last_cum_ret) > 0.001:
-            last_cum_ret = current_cum_ret
-            day = 0
-            state = indi_states_df.iloc[day]
-            # action: 0 (Buy), 1 (Sell), 2 (Do nothing)
-            action = self.learner.querysetstate(state)
-            holding_shares = 0
-            while day < prices_train.shape[0] - 1:
-                step_reward, shares_to_buy, holding_shares = self.calculate_reward(
-                    day, action, holding_shares, prices_train
+        best_cum_ret = -np.inf
+        stale_epochs = 0
+        stop_reason = "max_epochs"
+        start = time.perf_counter()
+        with stage_timer("qlearning.epochs", rows=len(states)) as timer:
+            for epoch in range(1, self.max_epochs + 1):
+                self.run_episode(states, rewards, trades_buf)
+                # Valued in place from the trade buffer; no portfolio frame is built
+                cum_ret = float(simulator.cumulative_return(trades_buf))
+                elapsed = time.perf_counter() - start
+                history.append(
+                    {
+                        "epoch": epoch,
+                        "cum_return": cum_ret,
+                        "rar": float(self.learner.rar),
+                        "elapsed": elapsed,
+                    }
                 )
-                state = indi_states_df.iloc[day + 1]
-                action = self.learner.query(state, step_reward)
-                trades.iloc[day] = shares_to_buy
-                day += 1
-            port_vals_df = utility.compute_portvals(
-                trades,
-                start_val=sv,
-                commission=self.commission,
-                impact=self.impact,
-                symbol=symbol,
-            )
-            portvals = port_vals_df[port_vals_df.columns[0]]
-            current_cum_ret = portvals.iloc[-1] / portvals.iloc[0] - 1
+                if progress_callback is not None:
+                    progress_callback(epoch=epoch, cum_return=cum_ret)
+                if abs(cum_ret - last_cum_ret) <= self.tolerance:
+                    stop_reason = "converged"
+                    break
+                last_cum_ret = cum_ret
+                if cum_ret > best_cum_ret + self.tolerance:
+                    best_cum_ret = cum_ret
+                    stale_epochs = 0
+                else:
+                    stale_epochs += 1
+                if self.patience is not None and stale_epochs >= self.patience:
+                    stop_reason = "patience"
+                    break
+                if self.max_seconds is not None and elapsed >= self.max_seconds:
+                    stop_reason = "max_seconds"
+                    break
+            timer.rows = len(history) * len(states)
+        observe_epochs("QLearningTrader", len(history))
+        self.training_stats = {
+            "epochs": len(history),
+            "stop_reason": stop_reason,
+            "cum_return": history[-1]["cum_return"] if history else None,
+            "history": history,
+        }
+        return self.training_stats
+
+    def reward_table(self, prices_arr):
+        """
+        Precompute the step reward for every (day, action, holding) combination.
+
+        Parameters
+        ----------
+        prices_arr : numpy.ndarray
+            Daily prices of the traded symbol
+
+        Returns
+        -------
+        numpy.ndarray
+            Array of shape (days - 1, 3, 3) where entry [day, a, h] equals the reward
+            ``calculate_reward`` returns for action ``a`` on ``day`` while holding
+            ``ACTION_POSITIONS[h]`` shares
+        """
+        daily_ret = prices_arr[1:] / prices_arr[:-1] - 1
+        base = np.stack([daily_ret, daily_ret * (-1), np.zeros_like(daily_ret)], axis=1)
+        impact_cost = np.where(SHARES_TO_BUY != 0, self.impact, 0.0)
+        return base[:, :, None] - impact_cost[None, :, :]
+
+    def run_episode(self, states, rewards, trades_buf):
+        """
+        Run one training pass over the whole period, updating the Q-table.
+
+        Parameters
+        ----------
+        states : numpy.ndarray
+            Integer indicator state for each day
+        rewards : numpy.ndarray
+            Reward table from ``reward_table``
+        trades_buf : numpy.ndarray
+            Buffer that receives the shares traded each day; the last day stays 0
+        """
+        # action: 0 (Buy), 1 (Sell), 2 (Do nothing)
+        action = self.learner.querysetstate(int(states[0]))
+        holding = CASH_ACTION
+        for day in range(states.shape[0] - 1):
+            step_reward = rewards[day, action, holding]
+            trades_buf[day] = SHARES_TO_BUY[action, holding]
+            holding = action
+            action = self.learner.query(int(states[day + 1]), step_reward)
+
+    def get_state(self):
+        """
+        Export the trained model as JSON-serializable metadata plus NumPy arrays.
+
+        Returns
+        -------
+        tuple
+            ``(meta, arrays)`` accepted by ``from_state``
+        """
+        meta = {
+            "model_type": "QLearningTrader",
+            "impact": self.impact,
+            "commission": self.commission,
+            "bins": self.bins,
+            "state_radices": self.encoder.radices,
+            "num_states": self.learner.num_states,
+            "learner": {
+                "alpha": self.learner.alpha,
+                "gamma": self.learner.gamma,
+                "rar": self.learner.rar,
+                "radr": self.learner.radr,
+                "dyna": self.learner.dyna,
+            },
+            "scaler_map": utility.serialize_scaler_map(self.scaler_map),
+            "indicators_with_params": getattr(self, "indicators_with_params", None),
+        }
+        return meta, self.learner.get_table()
+
+    @classmethod
+    def from_state(cls, meta, arrays):
+        """
+        Rebuild a trained model exported with ``get_state``.
+
+        Parameters
+        ----------
+        meta : dict
+            Model metadata
+        arrays : dict
+            Model arrays
+
+        Returns
+        -------
+        QLearningTrader
+            The restored model
+        """
+        model = cls(
+            impact=meta["impact"],
+            commission=meta["commission"],
+            bins=meta["bins"],
+            **meta["learner"],
+        )
+        model.scaler_map = utility.deserialize_scaler_map(meta["scaler_map"])
+        model.indicators_with_params = meta["indicators_with_params"]
+        if "state_radices" in meta:
+            model.encoder = StateEncoder(meta["state_radices"])
+        else:
+            # Models saved before mixed-radix states packed bins as decimal digits
+            n_indicators = len(model.indicators_with_params or {}) or 3
+            model.encoder = StateEncoder([10] * n_indicators)
+        model.learner = model.make_learner(
+            meta.get("num_states", np.asarray(arrays["q_table"]).shape[0])
+        )
+        model.learner.set_table(arrays)
+        return model
 
     # Test the model against new data
     def test_model(
@@ -119,6 +398,8 @@ class QLearningTrader(object):
         symbol="IBM",
         sd=datetime.datetime(2009, 1, 1),
         ed=datetime.datetime(2010, 1, 1),
+        prices=None,
+        indicators=None,
     ):
         """
         Test the trained model using the same indicators and parameters as in training.
@@ -133,6 +414,12 @@ class QLearningTrader(object):
             End date for test data
         sv : int
             The starting value of the portfolio
+        prices : pandas.DataFrame, optional
+            Preloaded output of ``utility.process_data`` for the same symbol and
+            dates; loaded from the price store if None
+        indicators : dict, optional
+            Precomputed raw indicator frames aligned with ``prices``, keyed by
+            indicator name; computed from the prices if None
 
         Returns
         -------
@@ -146,26 +433,80 @@ class QLearningTrader(object):
             raise ValueError(
                 "No indicators_with_params stored from training. Please train the model first."
             )
-        prices_test = utility.process_data(symbol, pd.date_range(sd, ed))
+        prices_test = prices
+        if prices_test is None:
+            prices_test = utility.process_data(symbol, pd.date_range(sd, ed))
         indi_states_test = self.get_indi_states(
-            prices_test, self.indicators_with_params
+            prices_test, self.indicators_with_params, indicators=indicators
+        )
+        states = indi_states_test.iloc[:, 0].to_numpy()
+        # Actions are queried one day at a time to keep the learner's random draws
+        # in order; the last day takes no action
+        actions = np.fromiter(
+            (
+                self.learner.querysetstate(state)
+                for state in states[:-1].astype(np.int64).tolist()
+            ),
+            np.int64,
+            max(prices_test.shape[0] - 1, 0),
         )
-        day = 0
-        holding_shares = 0
-        trades_test = pd.DataFrame(
-            0, index=prices_test.index, columns=prices_test.columns
+        trades = np.zeros(prices_test.shape[0], dtype=np.int64)
+        trades[:-1] = positions_to_trades(ACTION_POSITIONS[actions])
+        return pd.DataFrame(
+            np.repeat(trades[:, None], prices_test.shape[1], axis=1),
+            index=prices_test.index,
+            columns=prices_test.columns,
         )
-        while day < prices_test.shape[0] - 1:
-            state = indi_states_test.iloc[day]
-            action = self.learner.querysetstate(state)
-            step_reward, shares_to_buy, holding_shares = self.calculate_reward(
-                day, action, holding_shares, prices_test
+
+    def predict(self, indicators_arr, symbol="IBM"):
+        """
+        Predict trading signals for raw indicator values, one row per bar.
+
+        Values are normalized with the stored ``scaler_map`` and binned over the
+        training range with the same edges ``pd.cut`` used during training, then
+        the greedy action is read from the Q-table. Unlike ``test_model``, bins do
+        not depend on the range of the bars being scored, so one bar at a time
+        gives stable states.
+
+        Parameters
+        ----------
+        indicators_arr : numpy.ndarray
+            Raw indicator values of shape (bars, columns), with the columns of every
+            indicator in ``indicators_with_params`` order; only the first column of
+            each indicator is used, as in ``get_indi_states``
+        symbol : str
+            The stock symbol (unused)
+
+        Returns
+        -------
+        numpy.ndarray
+            Signal per bar: 1 (Long), -1 (Short) or 0 (Cash)
+        """
+        if (
+            not hasattr(self, "indicators_with_params")
+            or self.indicators_with_params is None
+        ):
+            raise ValueError(
+                "No indicators_with_params stored from training. Please train the model first."
             )
-            trades_test.iloc[day] = shares_to_buy
-            day += 1
-        return trades_test
+        mins, maxs, widths = utility.scaler_bounds(
+            self.scaler_map, self.indicators_with_params
+        )
+        first_cols = np.concatenate([[0], np.cumsum(widths)[:-1]])
+        indicators_arr = np.atleast_2d(indicators_arr)[:, first_cols]
+        norm = (indicators_arr - mins[first_cols]) / (
+            maxs[first_cols] - mins[first_cols]
+        )
+        # Training data spans [0, 1] after normalization; pd.cut bins are right-closed
+        inner_edges = np.linspace(0, 1, self.bins + 1)[1:-1]
+        digits = np.searchsorted(inner_edges, norm, side="left")
+        states = self.encoder.encode(digits)
+        actions = np.argmax(self.learner.state_values(states), axis=1)
+        return ACTION_SIGNALS[actions]
 
-    def get_indi_states(self, prices_data, indicators_with_params=None):
+    def get_indi_states(
+        self, prices_data, indicators_with_params=None, indicators=None
+    ):
         """
         Compute indicator states for Q-Learning using user-specified indicators and parameters.
 
@@ -174,44 +515,46 @@ class QLearningTrader(object):
         prices_data : pandas.DataFrame
             Historical price data
         indicators_with_params : dict, optional
-            Dictionary mapping indicator names to their parameter dicts. Must specify exactly three indicators.
+            Dictionary mapping indicator names to their parameter dicts, one bin
+            index per indicator in the state.
+        indicators : dict, optional
+            Precomputed raw indicator frames aligned with ``prices_data``, keyed by
+            indicator name
 
         Returns
         -------
         pandas.DataFrame
-            DataFrame of discretized indicator states.
+            Single-column DataFrame of encoded states, indexed like the first
+            indicator. Rows where any indicator is undefined take the previous
+            state (the first defined one at the start).
         """
-        # Default indicators if none provided
-        indicator_funcs = {
-            "gold cross": indicators.golden_death_cross,
-            "bbp": indicators.bollinger_band_indicator,
-            "roc": indicators.roc_indicator,
-            "macd": indicators.macd_indicator,
-            "rsi": indicators.rsi_indicator,
-        }
-        # Compute the three indicators
-        indi_states = None
-        scaler = 100
+        index = None
+        digit_columns = []
         for name, params in indicators_with_params.items():
-            if name not in indicator_funcs:
-                raise ValueError(f"Indicator '{name}' is not supported.")
             # Convert all parameters to integers
             params = {k: int(v) for k, v in params.items()}
-            df = indicator_funcs[name](prices_data, **params)
+            if indicators is not None:
+                df = indicators[name].copy()
+            else:
+                df = compute_indicator(name, prices_data, params)
             indicator_norm = self.discretize_(indicator_name=name, indicator_df=df)
-            if indi_states is None:
-                indi_states = indicator_norm.copy()
-                indi_states[indi_states.columns[0]] = 0
-            indi_states[indi_states.columns[0]] += (
-                indicator_norm[indicator_norm.columns[0]] * scaler
+            if index is None:
+                index = indicator_norm.index
+            digit_columns.append(
+                indicator_norm.iloc[:, 0].reindex(index).to_numpy(dtype=np.float64)
             )
-            scaler /= 10
-
-        indi_states.ffill(inplace=True)
-        indi_states.bfill(inplace=True)
-        indi_states = indi_states.astype("int32")
+        digits = np.column_stack(digit_columns)
 
-        return indi_states
+        valid = ~np.isnan(digits).any(axis=1)
+        if not valid.any():
+            raise ValueError("No date has values for every indicator")
+        states = np.zeros(digits.shape[0], dtype=np.int64)
+        states[valid] = self.encoder.encode(digits[valid])
+        # Forward fill, then back fill the leading rows
+        source = np.where(valid, np.arange(digits.shape[0]), -1)
+        np.maximum.accumulate(source, out=source)
+        source[source < 0] = np.argmax(valid)
+        return pd.DataFrame({"state": states[source]}, index=index)
 
     def calculate_reward(self, i_day, a, holding, prices_data):
         price_today = prices_data.iloc[i_day]
@@ -256,7 +599,7 @@ class QLearningTrader(object):
         indicator_norm, scaler_min_, scaler_max_ = utility.normalize_indicator(
             indicator_df, indicator_name=indicator_name, scaler_map=self.scaler_map
         )
-        if len(self.scaler_map) != 3:
+        if indicator_name not in self.scaler_map:
             self.scaler_map[indicator_name] = [scaler_min_, scaler_max_]
 
         indicator_norm[indicator_df.columns[0]] = pd.cut(
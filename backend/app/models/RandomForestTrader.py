@@ -1,11 +1,13 @@
 import numpy as np
 import pandas as pd
 import datetime
-from ..utils import indicators, utility
+from ..utils import utility
+from ..utils.indicator_cache import compute_indicator
+from ..utils.metrics import stage_timer
+from ..utils.portfolio import positions_to_trades
 from .BagEnsembleModel import BagEnsembleModel as bag
 from .TreeModel import TreeModel as tm
 
-
 """
 RandomForestTrader: Implements a bagged decision tree (Random Forest) trading strategy with technical indicators.
 
@@ -38,6 +40,8 @@ class RandomForestTrader(object):
         y_sell=-0.008,
         leaf_size=6,
         num_bags=10,
+        n_jobs=1,
+        seed=None,
     ):
         """
         Initialize the RandomForestTrader with trading parameters and model configuration.
@@ -50,6 +54,8 @@ class RandomForestTrader(object):
             y_sell (float): Sell threshold for N-day return.
             leaf_size (int): Leaf size for decision tree.
             num_bags (int): Number of bags for bagging.
+            n_jobs (int): Worker processes used to train the bags (-1 for all cores).
+            seed (int, optional): Seed for reproducible per-bag random streams.
         """
         self.scaler_map = {}
         self.impact = impact
@@ -57,7 +63,13 @@ class RandomForestTrader(object):
         self.N = n_day_return
         self.YBUY = y_buy + impact
         self.YSELL = y_sell - impact
-        self.learner = bag(tm, kwargs={"leaf_size": leaf_size}, bags=num_bags)
+        self.learner = bag(
+            tm,
+            kwargs={"leaf_size": leaf_size},
+            bags=num_bags,
+            n_jobs=n_jobs,
+            seed=seed,
+        )
 
     def train_model(
         self,
@@ -66,6 +78,9 @@ class RandomForestTrader(object):
         ed=datetime.datetime(2009, 1, 1),
         sv=100000,
         indicators_with_params=None,
+        progress_callback=None,
+        prices=None,
+        indicators=None,
     ):
         """
         Train the trading model using historical data and user-specified indicators.
@@ -76,6 +91,13 @@ class RandomForestTrader(object):
             ed (datetime): End date for training data.
             sv (float): Starting portfolio value (unused).
             indicators_with_params (dict): Mapping of indicator names to their parameter dicts.
+            progress_callback (callable, optional): Called with a ``stage`` keyword
+                argument as training advances. Exceptions it raises abort training.
+            prices (pandas.DataFrame, optional): Preloaded output of
+                ``utility.process_data`` for the same symbol and dates; loaded
+                from the price store if None.
+            indicators (dict, optional): Precomputed raw indicator frames aligned
+                with ``prices``, keyed by indicator name; computed if None.
         """
 
         if indicators_with_params is None:
@@ -85,9 +107,14 @@ class RandomForestTrader(object):
                 "macd": {"short_period": 12, "long_period": 26},
             }
         self.indicators_with_params = indicators_with_params
+        self.scaler_map = {}
 
-        prices_train = utility.process_data(symbol, pd.date_range(sd, ed))
-        indicators_df = self.get_indicators(prices_train, indicators_with_params)
+        prices_train = prices
+        if prices_train is None:
+            prices_train = utility.process_data(symbol, pd.date_range(sd, ed))
+        indicators_df = self.get_indicators(
+            prices_train, indicators_with_params, indicators=indicators
+        )
         ret_df = prices_train.copy()
         ret_df = (
             ret_df.shift(-1 * (self.N + 1)) / ret_df.shift(-1) - 1
@@ -99,28 +126,84 @@ class RandomForestTrader(object):
         # +1 (Long): N-day return > YBUY
         # -1 (Short): N-day return < YSELL
         # 0 (Cash): Otherwise
-        data_train_arr[:, -1] = np.where(
-            data_train_arr[:, -1] > self.YBUY, 1, data_train_arr[:, -1]
-        )
-        data_train_arr[:, -1] = np.where(
-            data_train_arr[:, -1] < self.YSELL, -1, data_train_arr[:, -1]
-        )
-        data_train_arr[:, -1] = np.where(
-            (data_train_arr[:, -1] != 1) & (data_train_arr[:, -1] != -1),
-            0,
-            data_train_arr[:, -1],
+        n_day_return = data_train_arr[:, -1]
+        data_train_arr[:, -1] = np.select(
+            [n_day_return > self.YBUY, n_day_return < self.YSELL], [1, -1], default=0
         )
 
         data_x = data_train_arr[:, :-1]
         data_y = data_train_arr[:, -1]
 
-        self.learner.add_evidence(data_x, data_y)
+        if progress_callback is not None:
+            progress_callback(stage="fitting", rows=int(data_x.shape[0]))
+        with stage_timer("random_forest.fit", rows=data_x.shape[0]):
+            self.learner.add_evidence(data_x, data_y)
+        if progress_callback is not None:
+            progress_callback(stage="fitted")
+
+    def get_state(self):
+        """
+        Export the trained model as JSON-serializable metadata plus NumPy arrays.
+
+        Returns:
+            tuple: ``(meta, arrays)`` accepted by ``from_state``; the trees are
+                stored concatenated with their row counts.
+        """
+        trees = [model.tree_array for model in self.learner.models]
+        meta = {
+            "model_type": "RandomForestTrader",
+            "impact": self.impact,
+            "commission": self.commission,
+            "n_day_return": self.N,
+            "y_buy": self.YBUY,
+            "y_sell": self.YSELL,
+            "leaf_size": self.learner.kwargs["leaf_size"],
+            "scaler_map": utility.serialize_scaler_map(self.scaler_map),
+            "indicators_with_params": getattr(self, "indicators_with_params", None),
+        }
+        arrays = {
+            "trees": np.concatenate(trees),
+            "tree_sizes": np.array([tree.shape[0] for tree in trees]),
+        }
+        return meta, arrays
+
+    @classmethod
+    def from_state(cls, meta, arrays):
+        """
+        Rebuild a trained model exported with ``get_state``.
+
+        Args:
+            meta (dict): Model metadata.
+            arrays (dict): Model arrays.
+
+        Returns:
+            RandomForestTrader: The restored model.
+        """
+        tree_sizes = np.asarray(arrays["tree_sizes"])
+        model = cls(
+            impact=meta["impact"],
+            commission=meta["commission"],
+            n_day_return=meta["n_day_return"],
+            leaf_size=meta["leaf_size"],
+            num_bags=len(tree_sizes),
+        )
+        # Thresholds are stored with the impact already applied
+        model.YBUY = meta["y_buy"]
+        model.YSELL = meta["y_sell"]
+        trees = np.split(np.asarray(arrays["trees"]), np.cumsum(tree_sizes)[:-1])
+        for tree_model, tree in zip(model.learner.models, trees):
+            tree_model.tree_array = tree
+        model.scaler_map = utility.deserialize_scaler_map(meta["scaler_map"])
+        model.indicators_with_params = meta["indicators_with_params"]
+        return model
 
     def test_model(
         self,
         symbol="IBM",
         sd=datetime.datetime(2009, 1, 1),
         ed=datetime.datetime(2010, 1, 1),
+        prices=None,
+        indicators=None,
     ):
         """
         Test the trading model on out-of-sample data using the same indicators and parameters as training.
@@ -129,6 +212,11 @@ class RandomForestTrader(object):
             symbol (str): The stock symbol to test on.
             sd (datetime): Start date for test data.
             ed (datetime): End date for test data.
+            prices (pandas.DataFrame, optional): Preloaded output of
+                ``utility.process_data`` for the same symbol and dates; loaded
+                from the price store if None.
+            indicators (dict, optional): Precomputed raw indicator frames aligned
+                with ``prices``, keyed by indicator name; computed if None.
 
         Returns:
             pandas.DataFrame: Trading signals for each day.
@@ -142,35 +230,43 @@ class RandomForestTrader(object):
                 "No indicators_with_params stored from training. Please train the model first."
             )
 
-        prices_test = utility.process_data(symbol, pd.date_range(sd, ed))
+        prices_test = prices
+        if prices_test is None:
+            prices_test = utility.process_data(symbol, pd.date_range(sd, ed))
         indicators_test_df = self.get_indicators(
-            prices_test, self.indicators_with_params
+            prices_test, self.indicators_with_params, indicators=indicators
         )
         data_test_x_arr = indicators_test_df.to_numpy()
         predict_res = self.learner.query(data_test_x_arr)
-        trades = pd.DataFrame(0.0, index=prices_test.index, columns=prices_test.columns)
-
-        holding_shares = 0
-        for i, pred in enumerate(predict_res[:-1]):
-            if pred == 1:  # Long
-                trades.iloc[i + 1] = 1000 - holding_shares
-                holding_shares = 1000
-            elif pred == -1:  # Short
-                trades.iloc[i + 1] = -1000 - holding_shares
-                holding_shares = -1000
-            else:  # pred == 0, Cash
-                trades.iloc[i + 1] = holding_shares * (-1)
-                holding_shares = 0
-
-        return trades
+
+        # Each day's prediction sets the position taken on the next day: 1000 shares
+        # long (1), 1000 short (-1) or cash (anything else)
+        positions = np.zeros(prices_test.shape[0])
+        positions[1:] = 1000.0 * (predict_res[:-1] == 1) - 1000.0 * (
+            predict_res[:-1] == -1
+        )
+        trades = positions_to_trades(positions)
+        return pd.DataFrame(
+            np.repeat(trades[:, None], prices_test.shape[1], axis=1),
+            index=prices_test.index,
+            columns=prices_test.columns,
+        )
 
     def predict(self, indicators_arr, symbol="IBM"):
         """
-        Predict trading signals for given indicator values (not implemented).
+        Predict trading signals for raw indicator values, one row per bar.
+
+        Values are normalized with the ``scaler_map`` stored at training time, so a
+        single new bar can be scored without recomputing a date range.
 
         Args:
-            indicators_arr (np.ndarray): Array of indicator values.
-            symbol (str): The stock symbol.
+            indicators_arr (np.ndarray): Raw indicator values of shape
+                ``(bars, columns)``, with the columns of every indicator in
+                ``indicators_with_params`` order (as ``get_indicators`` joins them).
+            symbol (str): The stock symbol (unused).
+
+        Returns:
+            np.ndarray: Signal per bar: 1 (Long), -1 (Short) or 0 (Cash).
         """
         if (
             not hasattr(self, "indicators_with_params")
@@ -180,46 +276,43 @@ class RandomForestTrader(object):
                 "No indicators_with_params stored from training. Please train the model first."
             )
 
-        ## TODO
-        pass
+        mins, maxs, _ = utility.scaler_bounds(
+            self.scaler_map, self.indicators_with_params
+        )
+        data_x = (np.atleast_2d(indicators_arr) - mins) / (maxs - mins)
+        return np.asarray(self.learner.query(data_x)).astype(int)
 
-    def get_indicators(self, prices_data, indicators_with_params):
+    def get_indicators(self, prices_data, indicators_with_params, indicators=None):
         """
         Calculate and normalize selected technical indicators with user-defined parameters.
 
         Args:
             prices_data (pandas.DataFrame): Historical price data.
             indicators_with_params (dict): Mapping of indicator names to their parameter dicts.
-            scaler_map (dict, optional): Existing scaler map for normalization.
+            indicators (dict, optional): Precomputed raw indicator frames aligned
+                with ``prices_data``, keyed by indicator name.
 
         Returns:
             pandas.DataFrame: Normalized technical indicators.
         """
 
-        indicator_funcs = {
-            "gold cross": indicators.golden_death_cross,
-            "bbp": indicators.bollinger_band_indicator,
-            "roc": indicators.roc_indicator,
-            "macd": indicators.macd_indicator,
-            "rsi": indicators.rsi_indicator,
-        }
-
         indicator_mapping = {}
 
         for name, params in indicators_with_params.items():
-            if name not in indicator_funcs:
-                raise ValueError(f"Indicator '{name}' is not supported.")
             # Convert all params to int if possible
             for k, v in params.items():
                 try:
                     params[k] = int(v)
                 except (ValueError, TypeError):
                     pass
-            indi_df = indicator_funcs[name](prices_data, **params)
+            if indicators is not None:
+                indi_df = indicators[name].copy()
+            else:
+                indi_df = compute_indicator(name, prices_data, params)
             indi_df, scaler_min_, scaler_max_ = utility.normalize_indicator(
                 indi_df, indicator_name=name, scaler_map=self.scaler_map
             )
-            if len(self.scaler_map) != 3:
+            if name not in self.scaler_map:
                 self.scaler_map[name] = [scaler_min_, scaler_max_]
 
             indicator_mapping[name] = indi_df
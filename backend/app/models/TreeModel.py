@@ -1,5 +1,4 @@
 import numpy as np
-from scipy import stats
 from ..utils import utility
 
 
@@ -20,8 +19,9 @@ class TreeModel(object):
         """
         self.tree_array = None
         self.leaf_size = leaf_size
+        self.rng = None
 
-    def add_evidence(self, data_x, data_y):
+    def add_evidence(self, data_x, data_y, rng=None):
         """
         Train the model using the provided data.
 
@@ -31,9 +31,13 @@ class TreeModel(object):
             Feature values used for training
         data_y : numpy.ndarray
             Target values to predict
+        rng : numpy.random.Generator, optional
+            Random stream for feature selection; the global NumPy RNG is used if None
         """
+        self.rng = rng
         data = np.hstack((data_x, np.atleast_2d(data_y).T))
         self.tree_array = self.build_tree(data)
+        self.rng = None
 
     def query(self, points):
         """
@@ -49,12 +53,45 @@ class TreeModel(object):
         numpy.ndarray
             Predicted values for each input point
         """
-        ret_arr = np.empty(points.shape[0])
-        idx = 0
-        for point in points:
-            ret_arr[idx] = self.predict_y(point, 0)
-            idx = idx + 1
-        return ret_arr
+        points = np.asarray(points)
+        feature_col, split_col, right_offset = self._node_columns()
+        if points.shape[0] == 1:
+            # A single point is cheaper to walk down the tree directly
+            point = points[0]
+            node = 0
+            while feature_col[node] != -1:
+                if point[feature_col[node]] <= split_col[node]:
+                    node += 1
+                else:
+                    node += right_offset[node]
+            return split_col[[node]]
+
+        # Move all points down the tree together, one level per iteration
+        nodes = np.zeros(points.shape[0], dtype=int)
+        active = np.flatnonzero(feature_col[nodes] != -1)
+        while active.size > 0:
+            current = nodes[active]
+            feature_val = points[active, feature_col[current]]
+            go_left = feature_val <= split_col[current]
+            nodes[active] = np.where(
+                go_left, current + 1, current + right_offset[current]
+            )
+            still_active = feature_col[nodes[active]] != -1
+            active = active[still_active]
+        return split_col[nodes]
+
+    def _node_columns(self):
+        # Decode the node columns once per tree instead of on every query
+        cache = getattr(self, "_node_cache", None)
+        if cache is None or cache[0] is not self.tree_array:
+            cache = (
+                self.tree_array,
+                self.tree_array[:, 0].astype(int),
+                self.tree_array[:, 1],
+                self.tree_array[:, -1].astype(int),
+            )
+            self._node_cache = cache
+        return cache[1:]
 
     def predict_y(self, point, root):
         """
@@ -84,7 +121,12 @@ class TreeModel(object):
 
     def build_tree(self, data):
         """
-        Recursively build the decision tree.
+        Build the decision tree into a preallocated node buffer.
+
+        Nodes are emitted in the same depth-first order as a recursive build, so
+        the random feature choices and the resulting tree are unchanged. Each
+        node owns a segment of one shared row-index array, which is partitioned
+        in place at every split instead of copying data slices.
 
         Parameters
         ----------
@@ -102,28 +144,88 @@ class TreeModel(object):
         """
         data_x = data[:, 0:-1]
         data_y = data[:, -1]
-        if data_x.shape[0] <= self.leaf_size:
-            mode_result = stats.mode(data_y)
-            return np.array([[-1, mode_result.mode, -1, -1]])
-        elif utility.all_y_same(data_y):
-            return np.array([[-1, data_y[-1], -1, -1]])
-        else:
-            feature_idx = np.random.randint(data_x.shape[1])
-            split_val = np.median(data[:, feature_idx])
-
-            split_idx_left = np.where(data[:, feature_idx] <= split_val)
-            split_idx_right = np.where(data[:, feature_idx] > split_val)
+        row_idx = np.arange(data.shape[0])
+        nodes = np.empty((max(16, 2 * data.shape[0] // max(self.leaf_size, 1) + 1), 4))
+        node_count = 0
+
+        # Each entry is (start, end, parent): rows row_idx[start:end] form the
+        # subtree, and parent is the node whose right-child offset points here
+        stack = [(0, data.shape[0], -1)]
+        while stack:
+            start, end, parent = stack.pop()
+            if node_count == nodes.shape[0]:
+                nodes = np.concatenate((nodes, np.empty_like(nodes)))
+            node = node_count
+            node_count += 1
+            if parent >= 0:
+                nodes[parent, 3] = node - parent
+
+            seg = row_idx[start:end]
+            seg_y = data_y[seg]
+            if seg.size <= self.leaf_size:
+                nodes[node] = (-1, self.mode_(seg_y), -1, -1)
+                continue
+            if utility.all_y_same(seg_y):
+                nodes[node] = (-1, seg_y[-1], -1, -1)
+                continue
+
+            if self.rng is None:
+                feature_idx = np.random.randint(data_x.shape[1])
+            else:
+                feature_idx = int(self.rng.integers(data_x.shape[1]))
+            feature_vals = data_x[seg, feature_idx]
+            split_val = self.median_(feature_vals)
 
+            go_left = feature_vals <= split_val
+            n_left = np.count_nonzero(go_left)
             # Handle edge case: can't split into two groups
-            if (split_idx_left[0].size == 0) or (split_idx_right[0].size == 0):
-                mode_result = stats.mode(data_y)
-                return np.array([[-1, mode_result.mode, -1, -1]])
+            if n_left == 0 or n_left == seg.size:
+                nodes[node] = (-1, self.mode_(seg_y), -1, -1)
+                continue
+
+            row_idx[start:end] = np.concatenate((seg[go_left], seg[~go_left]))
+            nodes[node] = (feature_idx, split_val, 1, 0)
+            stack.append((start + n_left, end, node))
+            stack.append((start, start + n_left, -1))
+
+        return nodes[:node_count].copy()
 
-            left_tree = self.build_tree(data[split_idx_left])
-            right_tree = self.build_tree(data[split_idx_right])
-            root = np.array([feature_idx, split_val, 1, left_tree.shape[0] + 1])
+    @staticmethod
+    def mode_(values):
+        """
+        Most frequent value, picking the smallest on ties like ``stats.mode``.
 
-            ret = np.append([root], left_tree, axis=0)
-            ret = np.append(ret, right_tree, axis=0)
+        Parameters
+        ----------
+        values : numpy.ndarray
+            One-dimensional values
 
-            return ret
+        Returns
+        -------
+        float
+            Mode of the values
+        """
+        uniques, counts = np.unique(values, return_counts=True)
+        return uniques[np.argmax(counts)]
+
+    @staticmethod
+    def median_(values):
+        """
+        Median by selection, matching ``np.median`` for NaN-free input.
+
+        Parameters
+        ----------
+        values : numpy.ndarray
+            One-dimensional values
+
+        Returns
+        -------
+        float
+            Median value
+        """
+        n = values.shape[0]
+        half = n // 2
+        if n % 2 == 1:
+            return np.partition(values, half)[half]
+        part = np.partition(values, (half - 1, half))
+        return (part[half - 1] + part[half]) / 2.0
@@ -0,0 +1,153 @@
+"""
+cache.py: Thread-safe, memory-bounded LRU cache.
+
+Entries are evicted least-recently-used first once their combined size exceeds the
+configured byte budget. Hit, miss and eviction counters are kept for monitoring.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+
+
+def default_sizeof(value):
+    """
+    Estimate the memory footprint of a cached value in bytes.
+
+    Args:
+        value: Cached object (DataFrame, Series, ndarray or anything else).
+
+    Returns:
+        int: Approximate size in bytes.
+    """
+    if hasattr(value, "memory_usage"):
+        usage = value.memory_usage(index=True)
+        return int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    return sys.getsizeof(value)
+
+
+class LRUCache(object):
+    """
+    Least-recently-used cache bounded by total entry size.
+
+    Args:
+        max_bytes (int): Memory budget for all entries combined.
+        sizeof (callable, optional): Function returning an entry's size in bytes.
+    """
+
+    def __init__(self, max_bytes, sizeof=default_sizeof):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        """
+        Return the cached value for ``key``, counting a hit or a miss.
+
+        Args:
+            key: Hashable cache key.
+            default: Value returned on a miss.
+
+        Returns:
+            The cached value, or ``default`` if absent.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        """
+        Insert or replace an entry, evicting old entries to stay within budget.
+
+        Values larger than the whole budget are not stored.
+
+        Args:
+            key: Hashable cache key.
+            value: Value to cache.
+
+        Returns:
+            list: ``(key, value)`` pairs evicted to make room.
+        """
+        size = self.sizeof(value)
+        evicted = []
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            if size > self.max_bytes:
+                return evicted
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                old_key, (old_value, old_size) = self._entries.popitem(last=False)
+                self.current_bytes -= old_size
+                self.evictions += 1
+                evicted.append((old_key, old_value))
+        return evicted
+
+    def pop(self, key, default=None):
+        """Remove an entry without counting a hit or a miss."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return default
+            self.current_bytes -= entry[1]
+            return entry[0]
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached value, computing and storing it on a miss.
+
+        Args:
+            key: Hashable cache key.
+            compute (callable): Zero-argument function producing the value.
+
+        Returns:
+            The cached or freshly computed value.
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """
+        Return cache counters.
+
+        Returns:
+            dict: Hits, misses, evictions, entry count and byte usage.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,117 @@
+"""
+downsample.py: Shape-preserving downsampling of price series for charting.
+
+Both methods return indices into the original series, always keep the first and
+last points, and return every index when the series already fits.
+"""
+
+import numpy as np
+
+DOWNSAMPLE_METHODS = ("lttb", "minmax")
+
+
+def lttb_indices(x, y, max_points):
+    """
+    Select points with Largest-Triangle-Three-Buckets.
+
+    The interior points are split into ``max_points - 2`` equal buckets; from each
+    bucket the point forming the largest triangle with the previously selected
+    point and the average of the next bucket is kept.
+
+    Args:
+        x (numpy.ndarray): Increasing x values, e.g. epoch days.
+        y (numpy.ndarray): Values to preserve the shape of.
+        max_points (int): Number of points to keep; values below 3 act as 3.
+
+    Returns:
+        numpy.ndarray: Sorted int64 indices of the kept points.
+    """
+    n = y.shape[0]
+    if max_points >= n or n <= 2:
+        return np.arange(n)
+    max_points = max(max_points, 3)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Bucket boundaries over the interior points 1 .. n - 2
+    edges = np.floor(np.linspace(1, n - 1, max_points - 1)).astype(np.int64)
+    # Average of every bucket, plus the last point as the final "next bucket"
+    x_cum = np.concatenate([[0.0], np.cumsum(x)])
+    y_cum = np.concatenate([[0.0], np.cumsum(y)])
+    counts = np.maximum(edges[1:] - edges[:-1], 1)
+    avg_x = np.append((x_cum[edges[1:]] - x_cum[edges[:-1]]) / counts, x[-1])
+    avg_y = np.append((y_cum[edges[1:]] - y_cum[edges[:-1]]) / counts, y[-1])
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for bucket in range(max_points - 2):
+        lo, hi = edges[bucket], max(edges[bucket + 1], edges[bucket] + 1)
+        next_x, next_y = avg_x[bucket + 1], avg_y[bucket + 1]
+        # Twice the triangle area; the constant factor does not change the argmax
+        area = np.abs(
+            (x[a] - next_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        selected[bucket + 1] = a
+    return selected
+
+
+def minmax_indices(y, max_points):
+    """
+    Keep the minimum and maximum of equal-width buckets.
+
+    Every bucket contributes its lowest and highest point in time order, so spikes
+    survive downsampling.
+
+    Args:
+        y (numpy.ndarray): Values to preserve the extremes of.
+        max_points (int): Upper bound on the number of points kept; values below 4
+            act as 4.
+
+    Returns:
+        numpy.ndarray: Sorted, unique int64 indices of the kept points.
+    """
+    n = y.shape[0]
+    if max_points >= n or n <= 2:
+        return np.arange(n)
+    n_buckets = max((max_points - 2) // 2, 1)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.floor(np.linspace(1, n - 1, n_buckets + 1)).astype(np.int64)
+    starts, ends = edges[:-1], np.maximum(edges[1:], edges[:-1] + 1)
+    width = int((ends - starts).max())
+    # Pad buckets to a common width so arg-extremes are found in one pass
+    offsets = np.arange(width)
+    positions = starts[:, None] + offsets[None, :]
+    valid = positions < ends[:, None]
+    positions = np.where(valid, positions, starts[:, None])
+    values = y[positions]
+    lows = positions[np.arange(n_buckets), np.argmin(values, axis=1)]
+    highs = positions[np.arange(n_buckets), np.argmax(values, axis=1)]
+    return np.unique(np.concatenate([[0, n - 1], lows, highs]))
+
+
+def downsample_indices(x, y, max_points, method="lttb"):
+    """
+    Select at most ``max_points`` points of a series.
+
+    Args:
+        x (numpy.ndarray): Increasing x values.
+        y (numpy.ndarray): Series values.
+        max_points (int): Maximum number of points to return.
+        method (str, optional): ``"lttb"`` or ``"minmax"``.
+
+    Returns:
+        numpy.ndarray: Sorted int64 indices of the kept points.
+
+    Raises:
+        ValueError: If the method is unknown.
+    """
+    if method == "lttb":
+        return lttb_indices(x, y, max_points)
+    if method == "minmax":
+        return minmax_indices(y, max_points)
+    raise ValueError(
+        f"Unknown downsampling method '{method}', expected one of "
+        f"{', '.join(DOWNSAMPLE_METHODS)}"
+    )
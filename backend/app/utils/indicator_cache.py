@@ -0,0 +1,93 @@
+"""
+indicator_cache.py: Shared memoization of technical indicator results.
+
+Indicator values are deterministic functions of the price data, indicator name and
+parameters, so repeated train/test/plot requests over the same configuration reuse
+the cached frames instead of recomputing them. Keys include a hash of the dates and
+prices, so a reloaded CSV or another data directory never hits stale entries.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+
+from .cache import LRUCache
+from .indicators import INDICATOR_FUNCS
+from .metrics import stage_timer
+
+DEFAULT_MAX_BYTES = int(os.environ.get("INDICATOR_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+indicator_cache = LRUCache(DEFAULT_MAX_BYTES)
+
+
+def indicator_key(name, prices_data, params):
+    """
+    Build the cache key for an indicator computed over a price frame.
+
+    Args:
+        name (str): Indicator name, e.g. "bbp".
+        prices_data (pandas.DataFrame): Price data indexed by date, one column per symbol.
+        params (dict): Indicator parameters.
+
+    Returns:
+        tuple: Hashable key of symbol(s), date range, row count, name, parameters
+            and a digest of the dates and values.
+    """
+    index = prices_data.index
+    return (
+        tuple(prices_data.columns),
+        index[0] if len(index) else None,
+        index[-1] if len(index) else None,
+        len(index),
+        name,
+        tuple(sorted(params.items())),
+        content_digest(prices_data),
+    )
+
+
+def content_digest(prices_data):
+    """
+    Hash the dates and values of a price frame.
+
+    Args:
+        prices_data (pandas.DataFrame): Price data indexed by date.
+
+    Returns:
+        bytes: 16-byte BLAKE2b digest.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.ascontiguousarray(prices_data.index.asi8).data)
+    digest.update(np.ascontiguousarray(prices_data.to_numpy(dtype=np.float64)).data)
+    return digest.digest()
+
+
+def compute_indicator(name, prices_data, params, cache=indicator_cache):
+    """
+    Compute an indicator, reusing a cached result when available.
+
+    Args:
+        name (str): Indicator name, one of ``indicators.INDICATOR_FUNCS``.
+        prices_data (pandas.DataFrame): Price data indexed by date.
+        params (dict): Keyword arguments for the indicator function.
+        cache (LRUCache, optional): Cache to use; None disables caching.
+
+    Returns:
+        pandas.DataFrame: Indicator values. Callers get their own copy and may
+        modify it freely.
+
+    Raises:
+        ValueError: If the indicator name is not supported.
+    """
+    if name not in INDICATOR_FUNCS:
+        raise ValueError(f"Indicator '{name}' is not supported.")
+
+    def compute():
+        # Only actual computations are timed; hits show up in the cache counters
+        with stage_timer(f"indicator.{name}", rows=len(prices_data)):
+            return INDICATOR_FUNCS[name](prices_data, **params)
+
+    if cache is None:
+        return compute()
+    result = cache.get_or_compute(indicator_key(name, prices_data, params), compute)
+    return result.copy()
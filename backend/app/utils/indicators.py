@@ -156,3 +156,13 @@ def rsi_indicator(prices, lookback):
     rsi[rsi == np.inf] = 100
     ret_df["RSI"] = rsi
     return ret_df
+
+
+# Indicator names accepted in indicators_with_params, mapped to their functions
+INDICATOR_FUNCS = {
+    "gold cross": golden_death_cross,
+    "bbp": bollinger_band_indicator,
+    "roc": roc_indicator,
+    "macd": macd_indicator,
+    "rsi": rsi_indicator,
+}
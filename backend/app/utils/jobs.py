@@ -0,0 +1,199 @@
+"""
+jobs.py: Bounded background job executor with progress reporting and cancellation.
+
+Long-running work such as model training is submitted to a fixed-size thread pool so
+API handlers can return a job ID immediately. Jobs report progress through
+``Job.report``, which also raises ``JobCancelled`` once cancellation was requested.
+"""
+
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job once cancellation has been requested."""
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are already queued or running."""
+
+
+class Job(object):
+    """
+    State of one background job.
+
+    Attributes:
+        job_id (str): Unique job identifier.
+        description (str): Human readable summary of the work.
+        status (str): One of queued, running, succeeded, failed or cancelled.
+        progress (dict): Latest progress values reported by the job.
+        result: Return value of the job function once it succeeded.
+        error (str): Error message if the job failed.
+    """
+
+    def __init__(self, description=""):
+        self.job_id = uuid.uuid4().hex
+        self.description = description
+        self.status = QUEUED
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancel_requested(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def report(self, **progress):
+        """
+        Record progress values; usable directly as a ``progress_callback``.
+
+        Raises:
+            JobCancelled: If cancellation has been requested.
+        """
+        self.progress.update(progress)
+        if self._cancel_event.is_set():
+            raise JobCancelled(f"Job {self.job_id} was cancelled")
+
+    def to_dict(self):
+        """
+        Return a JSON-serializable snapshot of the job state.
+
+        Returns:
+            dict: Job id, status, progress, error and timestamps.
+        """
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+        return {
+            "job_id": self.job_id,
+            "description": self.description,
+            "status": self.status,
+            "progress": dict(self.progress),
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed": elapsed,
+        }
+
+
+class JobExecutor(object):
+    """
+    Runs jobs on a bounded thread pool and keeps their state for polling.
+
+    Args:
+        max_workers (int, optional): Number of jobs that run concurrently.
+        max_pending (int, optional): Maximum number of queued plus running jobs;
+            further submissions raise ``JobQueueFull``.
+        max_finished (int, optional): Number of finished jobs kept for polling.
+    """
+
+    def __init__(self, max_workers=2, max_pending=16, max_finished=100):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="job"
+        )
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, description="", **kwargs):
+        """
+        Queue ``fn(job, *args, **kwargs)`` for background execution.
+
+        Args:
+            fn (callable): Job function; receives the Job as first argument.
+            description (str, optional): Summary shown when polling.
+
+        Returns:
+            Job: The queued job.
+
+        Raises:
+            JobQueueFull: If ``max_pending`` jobs are already queued or running.
+        """
+        job = Job(description)
+        with self._lock:
+            if self.active_count() >= self.max_pending:
+                raise JobQueueFull(
+                    f"Too many pending jobs (limit {self.max_pending}), retry later"
+                )
+            self._jobs[job.job_id] = job
+            self._prune()
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def list(self):
+        return list(self._jobs.values())
+
+    def active_count(self):
+        return sum(1 for job in self._jobs.values() if job.status in (QUEUED, RUNNING))
+
+    def cancel(self, job_id):
+        """
+        Request cancellation of a job.
+
+        Queued jobs are cancelled before they start; running jobs stop at their
+        next ``report`` call.
+
+        Args:
+            job_id (str): Job identifier.
+
+        Returns:
+            Job: The job, or None if unknown.
+        """
+        job = self._jobs.get(job_id)
+        if job is not None and job.status not in FINISHED_STATES:
+            job.cancel()
+        return job
+
+    def shutdown(self, wait=False):
+        for job in self.list():
+            if job.status not in FINISHED_STATES:
+                job.cancel()
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job, fn, args, kwargs):
+        if job.cancel_requested:
+            job.status = CANCELLED
+            job.finished_at = time.time()
+            return
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = fn(job, *args, **kwargs)
+            job.status = SUCCEEDED
+        except JobCancelled:
+            job.status = CANCELLED
+        except Exception as e:
+            traceback.print_exc()
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+
+    def _prune(self):
+        finished = [j for j in self._jobs.values() if j.status in FINISHED_STATES]
+        for job in finished[: max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job.job_id]
@@ -0,0 +1,131 @@
+"""
+live.py: Per-session, bar-by-bar signal generation for trained traders.
+
+A session keeps streaming indicator state, the last valid indicator values and the
+position held, so each new bar costs a constant amount of work regardless of how
+much history has already been fed.
+"""
+
+import math
+
+import numpy as np
+
+from .streaming_indicators import make_streaming_indicator
+from .utility import coerce_indicator_params
+
+POSITION_SIZE = 1000
+
+
+def _finite_price(value):
+    # NaN or infinite prices would poison the streaming indicator state for good
+    price = float(value)
+    if not math.isfinite(price):
+        raise ValueError(f"Price must be a finite number, got {value!r}")
+    return price
+
+
+class LiveSession(object):
+    """
+    Streaming signal generator for one trained model.
+
+    Signals follow ``test_model``: a signal computed from a bar's close sets the
+    position for the next bar, so ``trade`` is the order to place before it.
+
+    Args:
+        model: Trained ``QLearningTrader`` or ``RandomForestTrader``.
+    """
+
+    def __init__(self, model):
+        if getattr(model, "indicators_with_params", None) is None:
+            raise ValueError("The model has not been trained")
+        self.model = model
+        self.indicators = [
+            make_streaming_indicator(name, **params)
+            for name, params in coerce_indicator_params(
+                model.indicators_with_params
+            ).items()
+        ]
+        n_columns = sum(len(indicator.columns) for indicator in self.indicators)
+        # Last valid value of each indicator column, carried forward like ffill
+        self.features = np.full(n_columns, math.nan)
+        self.position = 0
+        self.bars = 0
+
+    @property
+    def ready(self):
+        return not np.isnan(self.features).any()
+
+    def _ingest(self, price):
+        values = []
+        for indicator in self.indicators:
+            values.extend(indicator.update(price))
+        values = np.asarray(values)
+        valid = ~np.isnan(values)
+        self.features[valid] = values[valid]
+        self.bars += 1
+
+    def _result(self, bar, signal):
+        if signal is None:
+            return {
+                "bar": bar,
+                "ready": False,
+                "signal": None,
+                "trade": 0,
+                "position": self.position,
+            }
+        target = int(signal) * POSITION_SIZE
+        trade = target - self.position
+        self.position = target
+        return {
+            "bar": bar,
+            "ready": True,
+            "signal": int(signal),
+            "trade": trade,
+            "position": self.position,
+        }
+
+    def update(self, price):
+        """
+        Ingest one bar and return the resulting signal.
+
+        Args:
+            price (float): Latest price.
+
+        Returns:
+            dict: Bar count, readiness, signal (1 Long, -1 Short, 0 Cash; None while
+                indicators are warming up), trade to place and resulting position.
+
+        Raises:
+            ValueError: If the price is not a finite number.
+        """
+        self._ingest(_finite_price(price))
+        if not self.ready:
+            return self._result(self.bars, None)
+        return self._result(self.bars, self.model.predict(self.features[None, :])[0])
+
+    def update_many(self, prices):
+        """
+        Ingest several bars in order, scoring them with one model call.
+
+        Args:
+            prices (iterable of float): Prices, oldest first.
+
+        Returns:
+            list of dict: One ``update`` result per bar.
+
+        Raises:
+            ValueError: If any price is not a finite number; no bar is ingested.
+        """
+        # Validate every price first so a bad one leaves the session untouched
+        prices = [_finite_price(price) for price in prices]
+        rows, ready = [], []
+        for price in prices:
+            self._ingest(price)
+            ready.append(self.ready)
+            rows.append(self.features.copy())
+        ready = np.asarray(ready, dtype=bool)
+        signals = np.empty(len(rows), dtype=object)
+        if ready.any():
+            signals[ready] = list(self.model.predict(np.asarray(rows)[ready]))
+        first_bar = self.bars - len(rows) + 1
+        return [self._result(first_bar + i, signal) for i, signal in enumerate(signals)]
@@ -0,0 +1,375 @@
+"""
+metrics.py: Lightweight counters, gauges and histograms in the Prometheus text format.
+
+Hot paths record stage durations and row counts through ``stage_timer``; values that
+already exist elsewhere, such as cache hit counters or the number of running jobs,
+are read by collector functions only when ``/metrics`` is scraped. Setting the
+``METRICS_ENABLED`` environment variable to ``0`` turns ``stage_timer`` into a
+shared no-op, so instrumented code pays a single attribute lookup per stage.
+
+Metrics are process-local: stages that run inside worker processes (sweeps,
+universe backtests, walk-forward windows) are not reported.
+"""
+
+import bisect
+import math
+import os
+import threading
+import time
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1").lower() not in (
+    "0",
+    "false",
+    "no",
+)
+
+# Upper bounds in seconds, from sub-millisecond cache reads to minutes-long training
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+def _format_labels(labelnames, labelvalues, extra=()):
+    pairs = list(zip(labelnames, labelvalues)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (
+            name,
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value):
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class Metric(object):
+    """
+    Base class of the metric types: a named family of labelled series.
+
+    Args:
+        name (str): Metric name.
+        documentation (str): Help text.
+        labelnames (tuple of str, optional): Label names; every update passes one
+            value per label, in this order.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def samples(self):
+        """
+        Return the current samples.
+
+        Returns:
+            list of tuple: ``(suffix, labelvalues, extra_labels, value)`` per sample.
+        """
+        with self._lock:
+            return [
+                ("", labelvalues, (), value)
+                for labelvalues, value in sorted(self._series.items())
+            ]
+
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def inc(self, amount=1, labelvalues=()):
+        with self._lock:
+            self._series[labelvalues] = self._series.get(labelvalues, 0) + amount
+
+
+class Gauge(Metric):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, value, labelvalues=()):
+        with self._lock:
+            self._series[labelvalues] = value
+
+
+class Histogram(Metric):
+    """
+    Distribution of observed values over cumulative buckets.
+
+    Args:
+        name (str): Metric name.
+        documentation (str): Help text.
+        labelnames (tuple of str, optional): Label names.
+        buckets (tuple of float, optional): Bucket upper bounds; ``+Inf`` is added.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, labelvalues=()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                # Per-bucket counts (last one is +Inf), sum of values
+                series = self._series[labelvalues] = [
+                    [0] * (len(self.buckets) + 1),
+                    0.0,
+                ]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self):
+        with self._lock:
+            snapshot = [
+                (labelvalues, list(counts), total)
+                for labelvalues, (counts, total) in sorted(self._series.items())
+            ]
+        out = []
+        bounds = self.buckets + (math.inf,)
+        for labelvalues, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                out.append(
+                    (
+                        "_bucket",
+                        labelvalues,
+                        (("le", _format_value(bound)),),
+                        cumulative,
+                    )
+                )
+            out.append(("_sum", labelvalues, (), total))
+            out.append(("_count", labelvalues, (), cumulative))
+        return out
+
+
+class MetricsRegistry(object):
+    """
+    Registered metrics and scrape-time collectors.
+
+    A collector is a function returning an iterable of
+    ``(name, kind, documentation, samples)`` with samples as ``(labels, value)``
+    pairs and ``labels`` a dict. Collectors should be cheap reads of existing state.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+        return collector
+
+    def render(self):
+        """
+        Render every metric in the Prometheus text exposition format (0.0.4).
+
+        Returns:
+            str: Exposition text ending with a newline.
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labelvalues, extra, value in metric.samples():
+                labels = _format_labels(metric.labelnames, labelvalues, extra)
+                lines.append(f"{metric.name}{suffix}{labels} {_format_value(value)}")
+        # Collectors may contribute samples to the same family, e.g. one per cache
+        families = {}
+        for collector in self._collectors:
+            for name, kind, documentation, samples in collector():
+                family = families.setdefault(name, (kind, documentation, []))
+                family[2].extend(samples)
+        for name, (kind, documentation, samples) in families.items():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                text = _format_labels(labels.keys(), labels.values())
+                lines.append(f"{name}{text} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    "trading_stage_duration_seconds",
+    "Wall time of instrumented pipeline stages.",
+    ("stage",),
+)
+STAGE_ROWS = registry.counter(
+    "trading_stage_rows_total",
+    "Rows processed by instrumented pipeline stages.",
+    ("stage",),
+)
+TRAINING_EPOCHS = registry.histogram(
+    "trading_training_epochs",
+    "Epochs until Q-learning training converged.",
+    ("model",),
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+
+
+class _StageTimer(object):
+    __slots__ = ("stage", "rows", "start")
+
+    def __init__(self, stage, rows):
+        self.stage = stage
+        self.rows = rows
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        labelvalues = (self.stage,)
+        STAGE_SECONDS.observe(time.perf_counter() - self.start, labelvalues)
+        if self.rows:
+            STAGE_ROWS.inc(self.rows, labelvalues)
+        return False
+
+
+class _NullTimer(object):
+    __slots__ = ()
+
+    # Accept and drop row counts assigned inside the block
+    rows = property(lambda self: 0, lambda self, value: None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def stage_timer(stage, rows=0):
+    """
+    Time a block as a pipeline stage.
+
+    Rows can be given upfront or assigned to the timer's ``rows`` attribute inside
+    the block once they are known::
+
+        with stage_timer("get_data") as timer:
+            df = load()
+            timer.rows = len(df)
+
+    Args:
+        stage (str): Stage name, used as the ``stage`` label.
+        rows (int, optional): Rows processed by the stage.
+
+    Returns:
+        Context manager recording the stage's duration and rows on exit, or a
+            shared no-op when metrics are disabled.
+    """
+    if not METRICS_ENABLED:
+        return _NULL_TIMER
+    return _StageTimer(stage, rows)
+
+
+def observe_epochs(model, epochs):
+    """
+    Record the number of epochs a training run took.
+
+    Args:
+        model (str): Model class name, used as the ``model`` label.
+        epochs (int): Completed epochs.
+    """
+    if METRICS_ENABLED:
+        TRAINING_EPOCHS.observe(epochs, (model,))
+
+
+def cache_collector(name, cache):
+    """
+    Build a collector exposing an ``LRUCache``'s counters.
+
+    Args:
+        name (str): Value of the ``cache`` label.
+        cache: Object with a ``stats()`` method returning hits, misses, evictions,
+            entries and bytes.
+
+    Returns:
+        callable: Collector for ``MetricsRegistry.add_collector``.
+    """
+
+    def collect():
+        stats = cache.stats()
+        labels = {"cache": name}
+        return [
+            (
+                "trading_cache_hits_total",
+                "counter",
+                "Cache lookups that found an entry.",
+                [(labels, stats["hits"])],
+            ),
+            (
+                "trading_cache_misses_total",
+                "counter",
+                "Cache lookups that found no entry.",
+                [(labels, stats["misses"])],
+            ),
+            (
+                "trading_cache_evictions_total",
+                "counter",
+                "Entries evicted to stay within the memory budget.",
+                [(labels, stats["evictions"])],
+            ),
+            (
+                "trading_cache_entries",
+                "gauge",
+                "Entries currently cached.",
+                [(labels, stats["entries"])],
+            ),
+            (
+                "trading_cache_bytes",
+                "gauge",
+                "Estimated size of the cached entries in bytes.",
+                [(labels, stats["bytes"])],
+            ),
+        ]
+
+    return collect
@@ -0,0 +1,172 @@
+"""
+model_registry.py: Keyed, memory-bounded store for trained models.
+
+Models are keyed by a hash of their full training configuration. The in-memory
+set is an LRU bounded by the size of the model arrays; every model is also written
+to a compact ``.npz`` file (arrays plus JSON metadata) so evicted models, or models
+trained before a restart, are reloaded lazily instead of retrained.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+
+from .cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = int(os.environ.get("MODEL_REGISTRY_MAX_BYTES", 256 * 1024 * 1024))
+DEFAULT_STORE_DIR = os.environ.get(
+    "MODEL_STORE_DIR",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "model_store")),
+)
+
+
+def config_key(config):
+    """
+    Hash a training configuration into a stable registry key.
+
+    Args:
+        config (dict): JSON-serializable configuration (model type, symbol, dates,
+            hyperparameters, indicators).
+
+    Returns:
+        str: Hex digest identifying the configuration.
+    """
+    canonical = json.dumps(config, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+
+def model_nbytes(model):
+    """
+    Estimate the memory footprint of a trained model from its exported arrays.
+
+    Args:
+        model: Model providing ``get_state``.
+
+    Returns:
+        int: Approximate size in bytes.
+    """
+    _, arrays = model.get_state()
+    return sum(int(np.asarray(arr).nbytes) for arr in arrays.values()) + 4096
+
+
+class ModelRegistry(object):
+    """
+    LRU registry of trained models with on-disk persistence.
+
+    Args:
+        model_classes (dict): Model type name to class providing ``get_state``
+            and ``from_state``.
+        max_bytes (int, optional): Memory budget for models held in memory.
+        store_dir (str, optional): Directory for persisted models; None keeps
+            models in memory only.
+    """
+
+    def __init__(
+        self, model_classes, max_bytes=DEFAULT_MAX_BYTES, store_dir=DEFAULT_STORE_DIR
+    ):
+        self.model_classes = model_classes
+        self.store_dir = store_dir
+        self._memory = LRUCache(max_bytes, sizeof=model_nbytes)
+        self._lock = threading.Lock()
+        # key -> number of times a model was stored under it in this process,
+        # so derived results (e.g. cached plots) can tell a retrained model apart
+        self._versions = {}
+        self._on_disk = set()
+        self._scan_store()
+
+    def __contains__(self, key):
+        return key in self._memory or key in self._on_disk
+
+    def put(self, key, model):
+        """
+        Store a trained model in memory and persist it to disk.
+
+        Args:
+            key (str): Registry key from ``config_key``.
+            model: Trained model.
+        """
+        self._memory.put(key, model)
+        with self._lock:
+            self._versions[key] = self._versions.get(key, 0) + 1
+        if self.store_dir is not None:
+            try:
+                self._save(key, model)
+                with self._lock:
+                    self._on_disk.add(key)
+            except OSError as e:
+                logger.warning("Could not persist model %s: %s", key, e)
+
+    def get(self, key):
+        """
+        Return the model for a key, reloading it from disk if it was evicted.
+
+        Args:
+            key (str): Registry key.
+
+        Returns:
+            The model, or None if unknown.
+        """
+        model = self._memory.get(key)
+        if model is not None or key not in self._on_disk:
+            return model
+        try:
+            model = self._load(key)
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning("Could not load model %s: %s", key, e)
+            return None
+        self._memory.put(key, model)
+        return model
+
+    def version(self, key):
+        """
+        Return how many times a model was stored under ``key`` in this process.
+
+        Args:
+            key (str): Registry key.
+
+        Returns:
+            int: Version counter, 0 for models only loaded from disk.
+        """
+        return self._versions.get(key, 0)
+
+    def stats(self):
+        stats = self._memory.stats()
+        stats["on_disk"] = len(self._on_disk)
+        return stats
+
+    def _path(self, key):
+        return os.path.join(self.store_dir, f"{key}.npz")
+
+    def _save(self, key, model):
+        meta, arrays = model.get_state()
+        os.makedirs(self.store_dir, exist_ok=True)
+        tmp_path = os.path.join(self.store_dir, f".{key}.{os.getpid()}.tmp.npz")
+        np.savez_compressed(tmp_path, __meta__=np.array(json.dumps(meta)), **arrays)
+        os.replace(tmp_path, self._path(key))
+
+    def _load(self, key):
+        with np.load(self._path(key), allow_pickle=False) as data:
+            meta = json.loads(str(data["__meta__"]))
+            arrays = {name: data[name] for name in data.files if name != "__meta__"}
+        return self.model_classes[meta["model_type"]].from_state(meta, arrays)
+
+    def _scan_store(self):
+        if self.store_dir is None or not os.path.isdir(self.store_dir):
+            return
+        for name in os.listdir(self.store_dir):
+            if not name.endswith(".npz") or name.startswith("."):
+                continue
+            path = os.path.join(self.store_dir, name)
+            try:
+                with np.load(path, allow_pickle=False) as data:
+                    json.loads(str(data["__meta__"]))["model_type"]
+            except (OSError, KeyError, ValueError) as e:
+                logger.warning("Skipping unreadable model file %s: %s", path, e)
+                continue
+            self._on_disk.add(name[: -len(".npz")])
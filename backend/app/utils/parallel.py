@@ -0,0 +1,80 @@
+"""
+parallel.py: Streaming fan-out of independent tasks over a process pool.
+
+A task context object is pickled once per worker process, when the worker starts,
+and then called for each item. Items are submitted through a bounded window of
+in-flight tasks and results are yielded in completion order, so callers can stream
+them out without holding every task or result in memory.
+"""
+
+import os
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# Per-process task context of pool workers, set by _init_worker
+_worker_context = None
+
+
+def _init_worker(context):
+    global _worker_context
+    _worker_context = context
+    context.setup()
+
+
+def _run_in_worker(item):
+    return _worker_context.run(item)
+
+
+def run_parallel(context, items, max_workers=None, window=None):
+    """
+    Run ``context.run(item)`` for every item, yielding results as they finish.
+
+    Args:
+        context: Picklable object with ``setup()``, called once per worker, and
+            ``run(item)``.
+        items (list): Task inputs.
+        max_workers (int, optional): Worker processes; defaults to the CPU count.
+            With one worker, items run in the calling process.
+        window (int, optional): Maximum number of tasks in flight; defaults to
+            twice the worker count.
+
+    Yields:
+        tuple: ``(index, result, error)`` in completion order, where ``index`` is
+            the item's position; ``result`` is None and ``error`` a message if
+            the task raised.
+    """
+    max_workers = max(1, min(max_workers or os.cpu_count() or 1, len(items)))
+    if max_workers == 1:
+        context.setup()
+        for index, item in enumerate(items):
+            try:
+                yield index, context.run(item), None
+            except Exception as e:
+                traceback.print_exc()
+                yield index, None, str(e)
+        return
+
+    window = window or 2 * max_workers
+    executor = ProcessPoolExecutor(
+        max_workers=max_workers, initializer=_init_worker, initargs=(context,)
+    )
+    remaining = iter(enumerate(items))
+    pending = {}
+    try:
+        while True:
+            for index, item in remaining:
+                pending[executor.submit(_run_in_worker, item)] = index
+                if len(pending) >= window:
+                    break
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                try:
+                    yield index, future.result(), None
+                except Exception as e:
+                    yield index, None, str(e)
+    finally:
+        # Also reached when the consumer stops early, e.g. a client disconnect
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,168 @@
+"""
+portfolio.py: Vectorized portfolio valuation for trading strategies.
+
+This module provides a reusable simulator that values one or many trade vectors
+against preloaded prices using cumulative sums, without building intermediate
+holdings/values DataFrames.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class PortfolioSimulator(object):
+    """
+    Portfolio valuation for a single symbol over a fixed date range.
+
+    Build it once per (symbol, date range) and evaluate as many trade vectors as
+    needed. Inputs are never modified.
+
+    Args:
+        prices (numpy.ndarray or pandas.Series or pandas.DataFrame): Daily prices of
+            the traded symbol. For a DataFrame the first column is used.
+        start_val (float, optional): Starting portfolio value. Defaults to 100000.
+        commission (float, optional): Commission per trade. Defaults to 9.95.
+        impact (float, optional): Market impact factor. Defaults to 0.005.
+    """
+
+    def __init__(self, prices, start_val=100000, commission=9.95, impact=0.005):
+        self.index = None
+        if isinstance(prices, pd.DataFrame):
+            prices = prices.iloc[:, 0]
+        if isinstance(prices, pd.Series):
+            self.index = prices.index
+            prices = prices.to_numpy(dtype=np.float64)
+        self.prices = np.asarray(prices, dtype=np.float64)
+        self.start_val = start_val
+        self.commission = commission
+        self.impact = impact
+
+    def _as_array(self, trades):
+        if isinstance(trades, pd.DataFrame):
+            trades = trades.iloc[:, 0]
+        if isinstance(trades, pd.Series):
+            trades = trades.to_numpy()
+        trades = np.asarray(trades, dtype=np.float64)
+        if trades.shape[-1] != self.prices.shape[0]:
+            raise ValueError(
+                f"Expected {self.prices.shape[0]} daily trades, got {trades.shape[-1]}"
+            )
+        return trades
+
+    def cash_flows(self, trades):
+        """
+        Compute the daily cash change caused by trades, including costs.
+
+        Args:
+            trades (array-like): Shares traded per day, shape ``(days,)`` or
+                ``(batch, days)``.
+
+        Returns:
+            numpy.ndarray: Cash flow per day, same shape as ``trades``.
+        """
+        trades = self._as_array(trades)
+        return (
+            self.prices * trades * (-1.0)
+            - self.commission * (trades != 0.0)
+            - self.prices * self.impact * np.abs(trades)
+        )
+
+    def evaluate(self, trades):
+        """
+        Compute the daily portfolio value for one or many trade vectors.
+
+        Args:
+            trades (array-like): Shares traded per day, shape ``(days,)`` or
+                ``(batch, days)``. DataFrames and Series are accepted too.
+
+        Returns:
+            numpy.ndarray: Portfolio values with the same shape as ``trades``.
+        """
+        trades = self._as_array(trades)
+        flows = self.cash_flows(trades)
+        flows[..., 0] += self.start_val
+        cash = np.cumsum(flows, axis=-1)
+        holdings = np.cumsum(trades, axis=-1)
+        return holdings * self.prices + cash
+
+    def cumulative_return(self, trades):
+        """
+        Compute the cumulative return(s) over the whole period.
+
+        Args:
+            trades (array-like): Shares traded per day, shape ``(days,)`` or
+                ``(batch, days)``.
+
+        Returns:
+            float or numpy.ndarray: ``end_value / start_value - 1`` per trade vector.
+        """
+        values = self.evaluate(trades)
+        return values[..., -1] / values[..., 0] - 1
+
+    def summary(self, trades):
+        """
+        Compute headline performance statistics for one trade vector.
+
+        Args:
+            trades (array-like): Shares traded per day, shape ``(days,)``.
+
+        Returns:
+            dict: Cumulative return, mean and standard deviation of daily returns,
+                annualized Sharpe ratio, maximum drawdown (as a negative fraction),
+                final portfolio value and number of trades.
+        """
+        trades = self._as_array(trades)
+        return portfolio_stats(
+            self.evaluate(trades), num_trades=np.count_nonzero(trades)
+        )
+
+
+def portfolio_stats(values, num_trades=None, trading_days=252):
+    """
+    Compute performance statistics of a daily portfolio value series.
+
+    Args:
+        values (array-like): Daily portfolio values.
+        num_trades (int, optional): Number of trades, included when given.
+        trading_days (int, optional): Trading days per year for annualization.
+
+    Returns:
+        dict: Plain Python floats keyed by statistic name.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    daily_ret = values[1:] / values[:-1] - 1
+    std_daily_ret = float(daily_ret.std(ddof=1)) if daily_ret.shape[0] > 1 else 0.0
+    avg_daily_ret = float(daily_ret.mean()) if daily_ret.shape[0] else 0.0
+    sharpe_ratio = (
+        float(np.sqrt(trading_days) * avg_daily_ret / std_daily_ret)
+        if std_daily_ret > 0
+        else 0.0
+    )
+    drawdown = values / np.maximum.accumulate(values) - 1
+    stats = {
+        "cum_return": float(values[-1] / values[0] - 1),
+        "avg_daily_ret": avg_daily_ret,
+        "std_daily_ret": std_daily_ret,
+        "sharpe_ratio": sharpe_ratio,
+        "max_drawdown": float(drawdown.min()),
+        "final_value": float(values[-1]),
+    }
+    if num_trades is not None:
+        stats["num_trades"] = int(num_trades)
+    return stats
+
+
+def positions_to_trades(positions, initial=0):
+    """
+    Convert daily target positions into the trades that reach them.
+
+    Args:
+        positions (array-like): Shares held after trading on each day.
+        initial (int or float, optional): Shares held before the first day.
+
+    Returns:
+        numpy.ndarray: Shares bought (positive) or sold (negative) on each day,
+            with the dtype of ``positions``.
+    """
+    positions = np.asarray(positions)
+    return np.diff(positions, prepend=np.asarray(initial, dtype=positions.dtype))
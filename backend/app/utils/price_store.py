@@ -0,0 +1,333 @@
+"""
+price_store.py: Memory-mapped columnar store for historical price data.
+
+Each ``<symbol>.csv`` file in the data directory is converted once into a binary
+columnar layout (a sorted ``datetime64[ns]`` date index plus a Fortran-ordered
+float64 matrix holding one contiguous column per CSV field) and saved as ``.npy``
+files. Later loads memory-map those files, so reading a date range is a
+``searchsorted`` lookup returning zero-copy slices instead of a full CSV parse.
+"""
+
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .metrics import stage_timer
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the on-disk layout changes so stale caches get rebuilt
+FORMAT_VERSION = 1
+
+DEFAULT_DATA_DIR = os.path.abspath(
+    os.environ.get(
+        "PRICE_DATA_DIR", os.path.join(os.path.dirname(__file__), "..", "..", "data")
+    )
+)
+CACHE_DIR_NAME = ".price_cache"
+# Threads reading or converting symbols concurrently in ``load_many``
+LOAD_MAX_WORKERS = int(os.environ.get("PRICE_LOAD_MAX_WORKERS", 16))
+
+
+class SymbolPrices(object):
+    """
+    Columnar price data of a single symbol.
+
+    Attributes:
+        symbol (str): Stock symbol.
+        dates (numpy.ndarray): Sorted ``datetime64[ns]`` trading dates.
+        columns (list of str): Names of the value columns, in CSV order.
+        values (numpy.ndarray): Fortran-ordered float64 matrix of shape
+            ``(len(dates), len(columns))``; usually a read-only memory map.
+    """
+
+    def __init__(self, symbol, dates, columns, values):
+        self.symbol = symbol
+        self.dates = dates
+        self.columns = list(columns)
+        self.values = values
+        self._column_idx = {name: i for i, name in enumerate(self.columns)}
+
+    def __len__(self):
+        return self.dates.shape[0]
+
+    def column(self, col_name):
+        """
+        Return a zero-copy view of one value column.
+
+        Args:
+            col_name (str): Column name, e.g. "Adj Close" or "Close".
+
+        Returns:
+            numpy.ndarray: Contiguous float64 view over every stored date.
+        """
+        if col_name not in self._column_idx:
+            raise KeyError(f"Column '{col_name}' not found for {self.symbol}")
+        return self.values[:, self._column_idx[col_name]]
+
+    def locate(self, start=None, end=None):
+        """
+        Find the row range covering ``start <= date <= end``.
+
+        Args:
+            start (datetime-like, optional): Inclusive start date.
+            end (datetime-like, optional): Inclusive end date.
+
+        Returns:
+            tuple: ``(lo, hi)`` so that ``dates[lo:hi]`` is the requested range.
+        """
+        lo = 0
+        hi = len(self)
+        if start is not None:
+            lo = np.searchsorted(self.dates, _to_datetime64(start), side="left")
+        if end is not None:
+            hi = np.searchsorted(self.dates, _to_datetime64(end), side="right")
+        return int(lo), int(max(lo, hi))
+
+    def align(self, target_dates, col_name):
+        """
+        Gather one column onto arbitrary target dates (like a left join).
+
+        Args:
+            target_dates (numpy.ndarray): ``datetime64[ns]`` dates to align to.
+            col_name (str): Column name to gather.
+
+        Returns:
+            numpy.ndarray: Float64 values, NaN where a target date is missing.
+        """
+        column = self.column(col_name)
+        out = np.full(target_dates.shape[0], np.nan)
+        if len(self) == 0:
+            return out
+        pos = np.searchsorted(self.dates, target_dates)
+        pos_clipped = np.minimum(pos, len(self) - 1)
+        found = self.dates[pos_clipped] == target_dates
+        out[found] = column[pos_clipped[found]]
+        return out
+
+
+class PriceStore(object):
+    """
+    Lazily converts CSV price files to memory-mapped columnar arrays.
+
+    Conversion happens the first time a symbol is requested, and again only if
+    the source CSV's size or modification time changes. Each symbol has its own
+    lock, so different symbols can be converted concurrently. If the cache
+    directory cannot be written, the parsed arrays are kept in memory instead.
+
+    Args:
+        data_dir (str, optional): Directory holding ``<symbol>.csv`` files.
+        cache_dir (str, optional): Directory for the binary cache. Defaults to
+            a hidden ``.price_cache`` folder inside ``data_dir``.
+    """
+
+    def __init__(self, data_dir=None, cache_dir=None):
+        self.data_dir = os.path.abspath(data_dir or DEFAULT_DATA_DIR)
+        self.cache_dir = cache_dir or os.path.join(self.data_dir, CACHE_DIR_NAME)
+        self._loaded = {}
+        self._lock = threading.Lock()
+        self._symbol_locks = {}
+
+    def csv_path(self, symbol):
+        return os.path.join(self.data_dir, f"{symbol}.csv")
+
+    def load(self, symbol):
+        """
+        Return the columnar prices of a symbol, converting its CSV if needed.
+
+        Args:
+            symbol (str): Stock symbol.
+
+        Returns:
+            SymbolPrices: Memory-mapped price data.
+
+        Raises:
+            FileNotFoundError: If no CSV exists for the symbol.
+        """
+        stat = os.stat(self.csv_path(symbol))
+        source_key = (stat.st_mtime_ns, stat.st_size)
+        entry = self._loaded.get(symbol)
+        if entry is not None and entry[0] == source_key:
+            return entry[1]
+        with self._lock:
+            symbol_lock = self._symbol_locks.setdefault(symbol, threading.Lock())
+        with symbol_lock:
+            entry = self._loaded.get(symbol)
+            if entry is not None and entry[0] == source_key:
+                return entry[1]
+            prices = self._open_cached(symbol, source_key)
+            if prices is None:
+                prices = self._convert(symbol, source_key)
+            self._loaded[symbol] = (source_key, prices)
+            return prices
+
+    def load_many(self, symbols, max_workers=LOAD_MAX_WORKERS):
+        """
+        Load several symbols, reading or converting them concurrently.
+
+        Symbols already mapped and unchanged are returned without using the pool,
+        so the pool only runs when files actually have to be opened or parsed.
+
+        Args:
+            symbols (list of str): Stock symbols.
+            max_workers (int, optional): Maximum threads.
+
+        Returns:
+            list of SymbolPrices: Price data in the order of ``symbols``.
+
+        Raises:
+            FileNotFoundError: If no CSV exists for one of the symbols.
+        """
+        result = [None] * len(symbols)
+        pending = []
+        for i, symbol in enumerate(symbols):
+            stat = os.stat(self.csv_path(symbol))
+            entry = self._loaded.get(symbol)
+            if entry is not None and entry[0] == (stat.st_mtime_ns, stat.st_size):
+                result[i] = entry[1]
+            else:
+                pending.append(i)
+        if len(pending) == 1 or max_workers <= 1:
+            for i in pending:
+                result[i] = self.load(symbols[i])
+        elif pending:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as pool:
+                loaded = pool.map(self.load, [symbols[i] for i in pending])
+                for i, prices in zip(pending, loaded):
+                    result[i] = prices
+        return result
+
+    def symbols(self):
+        """
+        List the symbols that have a CSV in the data directory.
+
+        Returns:
+            list of str: Sorted symbols.
+        """
+        return sorted(
+            os.path.splitext(name)[0]
+            for name in os.listdir(self.data_dir)
+            if name.endswith(".csv")
+        )
+
+    def build_all(self):
+        """
+        Convert every CSV in the data directory up front.
+
+        Returns:
+            list of str: Symbols available in the store.
+        """
+        symbols = self.symbols()
+        self.load_many(symbols)
+        return symbols
+
+    def stats(self):
+        """Number of symbols currently mapped in this process."""
+        return {"loaded": len(self._loaded)}
+
+    def invalidate(self, symbol=None):
+        """Drop one (or every) symbol from the in-process map."""
+        with self._lock:
+            if symbol is None:
+                self._loaded.clear()
+            else:
+                self._loaded.pop(symbol, None)
+
+    def _cache_paths(self, symbol):
+        base = os.path.join(self.cache_dir, symbol)
+        return base + ".meta.json", base + ".dates.npy", base + ".values.npy"
+
+    def _open_cached(self, symbol, source_key):
+        meta_path, dates_path, values_path = self._cache_paths(symbol)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if (
+                meta.get("version") != FORMAT_VERSION
+                or tuple(meta.get("source")) != source_key
+            ):
+                return None
+            dates = np.load(dates_path, mmap_mode="r")
+            values = np.load(values_path, mmap_mode="r")
+        except (OSError, ValueError, TypeError):
+            return None
+        return SymbolPrices(symbol, dates, meta["columns"], values)
+
+    def _convert(self, symbol, source_key):
+        with stage_timer("price_store.convert") as timer:
+            df = pd.read_csv(
+                self.csv_path(symbol),
+                index_col="Date",
+                parse_dates=True,
+                na_values=["nan"],
+            ).sort_index()
+            timer.rows = len(df)
+        dates = df.index.values.astype("datetime64[ns]")
+        values = np.asfortranarray(df.to_numpy(dtype=np.float64))
+        columns = [str(c) for c in df.columns]
+
+        meta_path, dates_path, values_path = self._cache_paths(symbol)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            _atomic_save(dates_path, dates)
+            _atomic_save(values_path, values)
+            tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(
+                    {
+                        "version": FORMAT_VERSION,
+                        "source": list(source_key),
+                        "columns": columns,
+                    },
+                    f,
+                )
+            os.replace(tmp_path, meta_path)
+        except OSError as e:
+            logger.warning(
+                "Price cache not writable (%s); keeping %s in memory", e, symbol
+            )
+            return SymbolPrices(symbol, dates, columns, values)
+        return self._open_cached(symbol, source_key) or SymbolPrices(
+            symbol, dates, columns, values
+        )
+
+
+def _atomic_save(path, arr):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, arr)
+    os.replace(tmp_path, path)
+
+
+def _to_datetime64(value):
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_localize(None)
+    return np.datetime64(ts.value, "ns")
+
+
+_default_stores = {}
+_default_lock = threading.Lock()
+
+
+def get_price_store(data_dir=None):
+    """
+    Return the shared PriceStore for a data directory.
+
+    Args:
+        data_dir (str, optional): Data directory; defaults to ``backend/data``.
+
+    Returns:
+        PriceStore: Process-wide store instance for that directory.
+    """
+    key = os.path.abspath(data_dir or DEFAULT_DATA_DIR)
+    store = _default_stores.get(key)
+    if store is None:
+        with _default_lock:
+            store = _default_stores.setdefault(key, PriceStore(key))
+    return store
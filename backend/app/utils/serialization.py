@@ -0,0 +1,113 @@
+"""
+serialization.py: Fast JSON encoding of NumPy-backed responses with optional gzip.
+
+Responses are built from NumPy arrays and encoded by orjson in a single native pass,
+so array elements are never converted to Python objects one by one. Bodies of at
+least ``GZIP_MIN_BYTES`` are gzip-compressed for clients that accept it.
+"""
+
+import gzip
+import os
+
+import numpy as np
+import orjson
+from fastapi.responses import Response
+
+# Smaller bodies gain too little from compression to be worth the CPU time
+GZIP_MIN_BYTES = int(os.environ.get("GZIP_MIN_BYTES", 1024))
+GZIP_LEVEL = int(os.environ.get("GZIP_LEVEL", 6))
+
+
+def encode_json(content):
+    """
+    Encode a response body as compact UTF-8 JSON.
+
+    NumPy arrays and scalars are serialized natively; datetime64 arrays become ISO
+    8601 strings and NaN becomes null.
+
+    Args:
+        content: JSON-compatible object that may contain NumPy arrays. Arrays must
+            be C-contiguous.
+
+    Returns:
+        bytes: Encoded body.
+    """
+    return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def iso_dates(index):
+    """
+    Prepare dates for ``encode_json`` as ``YYYY-MM-DDTHH:MM:SS`` strings.
+
+    Args:
+        index (pandas.DatetimeIndex or numpy.ndarray): Dates.
+
+    Returns:
+        numpy.ndarray: ``datetime64[s]`` array.
+    """
+    return np.asarray(index, dtype="datetime64[s]")
+
+
+def compress(body):
+    """
+    Gzip a body if it is large enough to benefit.
+
+    Args:
+        body (bytes): Encoded body.
+
+    Returns:
+        bytes: Compressed body, or None if the body is below ``GZIP_MIN_BYTES``.
+    """
+    if len(body) < GZIP_MIN_BYTES:
+        return None
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def accepts_gzip(accept_encoding):
+    """
+    Check whether an Accept-Encoding header allows gzip.
+
+    Args:
+        accept_encoding (str): Header value, None if absent.
+
+    Returns:
+        bool: True if gzip (or ``*``) is listed without ``q=0``.
+    """
+    if not accept_encoding:
+        return False
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        if coding.strip().lower() not in ("gzip", "*"):
+            continue
+        quality = params.strip().replace(" ", "")
+        if quality.startswith("q="):
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def json_response(body, accept_encoding=None, gzipped=None, headers=None):
+    """
+    Build a JSON response, gzip-encoded when the client accepts it.
+
+    Args:
+        body (bytes): Encoded JSON body.
+        accept_encoding (str, optional): Request's Accept-Encoding header.
+        gzipped (bytes, optional): Precompressed body, e.g. from a cache; the body
+            is compressed on demand if None.
+        headers (dict, optional): Extra response headers.
+
+    Returns:
+        fastapi.responses.Response: Response with ``Vary: Accept-Encoding`` set
+            whenever the body is large enough to be compressed.
+    """
+    headers = dict(headers or {})
+    if len(body) >= GZIP_MIN_BYTES:
+        headers["Vary"] = "Accept-Encoding"
+        if accepts_gzip(accept_encoding):
+            headers["Content-Encoding"] = "gzip"
+            body = gzipped if gzipped is not None else compress(body)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,338 @@
+"""
+streaming_indicators.py: Stateful, O(1)-per-bar versions of the indicators in
+``indicators.py``.
+
+Each class ingests one price at a time (or a batch, bar by bar) and keeps only the
+state its indicator needs: ring buffers with sliding means and variances for the
+rolling-window indicators, and exponentially weighted sums for MACD. Outputs match
+the batch functions to floating point rounding, with NaN wherever the batch
+function returns NaN. The only exception is a Bollinger window of identical prices,
+where the band width is zero and the batch value is itself rounding noise.
+
+The streaming indicators take a single price series, one float per bar.
+"""
+
+import math
+
+import numpy as np
+
+
+class RollingWindow(object):
+    """
+    Fixed-size ring buffer with a sliding mean and variance.
+
+    The mean and sum of squared deviations are updated in O(1) per value (Welford's
+    algorithm, extended to removals) and recomputed exactly from the buffer once per
+    full cycle, so rounding errors cannot accumulate over long streams. Like pandas,
+    a window of identical values has exactly that mean and zero variance.
+
+    Parameters
+    ----------
+    size : int
+        Number of most recent values kept
+    """
+
+    def __init__(self, size):
+        if size < 1:
+            raise ValueError("Window size must be at least 1")
+        self.size = size
+        self.buffer = np.zeros(size)
+        self.count = 0
+        self.pos = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.last = None
+        # Number of consecutive identical values ending at the latest one
+        self.same_run = 0
+
+    @property
+    def full(self):
+        return self.count == self.size
+
+    @property
+    def oldest(self):
+        """The oldest value in a full window, which the next push replaces."""
+        return self.buffer[self.pos] if self.full else self.buffer[0]
+
+    def push(self, value):
+        self.same_run = self.same_run + 1 if value == self.last else 1
+        self.last = value
+        if self.count < self.size:
+            self.count += 1
+            delta = value - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (value - self.mean)
+        else:
+            old = self.buffer[self.pos]
+            old_mean = self.mean
+            self.mean += (value - old) / self.size
+            self.m2 += (value - old) * (value - self.mean + old - old_mean)
+        self.buffer[self.pos] = value
+        self.pos += 1
+        if self.pos == self.size:
+            self.pos = 0
+            self.mean = float(self.buffer.mean())
+            self.m2 = float(((self.buffer - self.mean) ** 2).sum())
+
+    def average(self):
+        """Mean of the window, NaN until it is full."""
+        if not self.full:
+            return math.nan
+        return self.last if self.same_run >= self.size else self.mean
+
+    def variance(self):
+        """Sample variance (``ddof=1``) of the window, NaN until it is full."""
+        if not self.full or self.size < 2:
+            return math.nan
+        if self.same_run >= self.size:
+            return 0.0
+        return max(self.m2, 0.0) / (self.size - 1)
+
+
+class StreamingIndicator(object):
+    """
+    Base class of the streaming indicators.
+
+    Subclasses set ``columns`` to the batch function's output columns and implement
+    ``update``.
+    """
+
+    columns = ()
+
+    def update(self, price):
+        """
+        Ingest one bar.
+
+        Parameters
+        ----------
+        price : float
+            Latest price
+
+        Returns
+        -------
+        tuple
+            Indicator values for this bar, one per column
+        """
+        raise NotImplementedError
+
+    def update_many(self, prices):
+        """
+        Ingest a batch of bars in order.
+
+        Parameters
+        ----------
+        prices : array-like
+            Prices, oldest first
+
+        Returns
+        -------
+        numpy.ndarray
+            Array of shape (len(prices), len(columns)) with the values after each bar
+        """
+        prices = np.asarray(prices, dtype=np.float64).ravel()
+        out = np.empty((prices.shape[0], len(self.columns)))
+        for i, price in enumerate(prices.tolist()):
+            out[i] = self.update(price)
+        return out
+
+
+def _divide(numerator, denominator):
+    # Float division with pandas semantics: x/0 is +-inf and 0/0 is NaN
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return float(np.float64(numerator) / np.float64(denominator))
+
+
+class StreamingGoldenDeathCross(StreamingIndicator):
+    """
+    Streaming version of ``golden_death_cross``.
+
+    Parameters
+    ----------
+    lookback_1 : int, optional
+        Period for the shorter-term SMA, defaults to 20
+    lookback_2 : int, optional
+        Period for the longer-term SMA, defaults to 50
+    """
+
+    def __init__(self, lookback_1=20, lookback_2=50):
+        self.columns = ("%d-day SMA" % lookback_1, "%d-day SMA" % lookback_2)
+        self.window_1 = RollingWindow(lookback_1)
+        self.window_2 = RollingWindow(lookback_2)
+
+    def update(self, price):
+        self.window_1.push(price)
+        self.window_2.push(price)
+        return self.window_1.average(), self.window_2.average()
+
+
+class StreamingBollingerBand(StreamingIndicator):
+    """
+    Streaming version of ``bollinger_band_indicator`` (%B).
+
+    Parameters
+    ----------
+    lookback : int, optional
+        Period for the moving average and standard deviation, defaults to 20
+    """
+
+    columns = ("%B",)
+
+    def __init__(self, lookback=20):
+        self.window = RollingWindow(lookback)
+
+    def update(self, price):
+        self.window.push(price)
+        if not self.window.full:
+            return (math.nan,)
+        sma = self.window.average()
+        std = math.sqrt(self.window.variance())
+        lower_band = sma - 2 * std
+        upper_band = sma + 2 * std
+        return (_divide(price - lower_band, upper_band - lower_band),)
+
+
+class StreamingRoc(StreamingIndicator):
+    """
+    Streaming version of ``roc_indicator``.
+
+    The batch function drops its leading NaN rows; the streaming version returns
+    NaN for those bars instead.
+
+    Parameters
+    ----------
+    lookback : int
+        Period for the ROC calculation
+    """
+
+    columns = ("ROC",)
+
+    def __init__(self, lookback):
+        # The batch function compares with the price lookback - 1 bars earlier
+        self.window = RollingWindow(max(lookback, 1))
+
+    def update(self, price):
+        self.window.push(price)
+        if not self.window.full:
+            return (math.nan,)
+        return ((_divide(price, self.window.oldest) - 1) * 100,)
+
+
+class StreamingEma(object):
+    """
+    Exponentially weighted mean matching ``pandas.Series.ewm(span=...).mean()``.
+
+    Parameters
+    ----------
+    span : float
+        Decay in terms of span, ``alpha = 2 / (span + 1)``
+    """
+
+    def __init__(self, span):
+        self.decay = 1.0 - 2.0 / (span + 1.0)
+        self.weighted_sum = 0.0
+        self.weight_total = 0.0
+
+    def update(self, value):
+        # adjust=True weights: the mean of all values seen, weighted decay ** age
+        self.weighted_sum = value + self.decay * self.weighted_sum
+        self.weight_total = 1.0 + self.decay * self.weight_total
+        return self.weighted_sum / self.weight_total
+
+
+class StreamingMacd(StreamingIndicator):
+    """
+    Streaming version of ``macd_indicator``.
+
+    Parameters
+    ----------
+    short_period : int, optional
+        Period for the short-term EMA, defaults to 12
+    long_period : int, optional
+        Period for the long-term EMA, defaults to 26
+    signal_period : int, optional
+        Period for the signal line EMA, defaults to 9; like the batch function's
+        signal line, it is tracked but not returned
+    """
+
+    columns = ("MACD",)
+
+    def __init__(self, short_period=12, long_period=26, signal_period=9):
+        self.ema_short = StreamingEma(short_period)
+        self.ema_long = StreamingEma(long_period)
+        self.ema_signal = StreamingEma(signal_period)
+        self.signal = math.nan
+
+    def update(self, price):
+        macd = self.ema_short.update(price) - self.ema_long.update(price)
+        self.signal = self.ema_signal.update(macd)
+        return (macd,)
+
+
+class StreamingRsi(StreamingIndicator):
+    """
+    Streaming version of ``rsi_indicator``.
+
+    Parameters
+    ----------
+    lookback : int
+        Period for the RSI calculation
+    """
+
+    columns = ("RSI",)
+
+    def __init__(self, lookback):
+        self.gains = RollingWindow(lookback)
+        self.losses = RollingWindow(lookback)
+        self.last_price = None
+
+    def update(self, price):
+        if self.last_price is None:
+            # The first price has no change, so the batch window starts one bar later
+            self.last_price = price
+            return (math.nan,)
+        change = price - self.last_price
+        self.last_price = price
+        self.gains.push(max(change, 0.0))
+        self.losses.push(max(-change, 0.0))
+        if not self.gains.full:
+            return (math.nan,)
+        # Both windows hold non-negative values; clamp rounding noise like pandas
+        rs = _divide(max(self.gains.average(), 0.0), max(self.losses.average(), 0.0))
+        rsi = 100.0 - _divide(100.0, 1.0 + rs)
+        return (100.0 if rsi == math.inf else rsi,)
+
+
+# Indicator names accepted in indicators_with_params, mapped to streaming classes
+STREAMING_INDICATORS = {
+    "gold cross": StreamingGoldenDeathCross,
+    "bbp": StreamingBollingerBand,
+    "roc": StreamingRoc,
+    "macd": StreamingMacd,
+    "rsi": StreamingRsi,
+}
+
+
+def make_streaming_indicator(name, **params):
+    """
+    Create the streaming counterpart of a batch indicator.
+
+    Parameters
+    ----------
+    name : str
+        Indicator name, one of ``STREAMING_INDICATORS``
+    **params
+        The batch function's keyword arguments
+
+    Returns
+    -------
+    StreamingIndicator
+        A new indicator with empty state
+
+    Raises
+    ------
+    ValueError
+        If the indicator name is not supported
+    """
+    if name not in STREAMING_INDICATORS:
+        raise ValueError(f"Indicator '{name}' is not supported.")
+    return STREAMING_INDICATORS[name](**params)
@@ -0,0 +1,218 @@
+"""
+sweep.py: Parallel hyperparameter sweeps over a trading model's parameter grid.
+
+Prices and indicator values for the training and test periods are loaded once in
+the calling process and handed to every worker when it starts, so each combination
+only pays for fitting and testing its own model. Results are yielded as soon as
+each combination finishes.
+"""
+
+import bisect
+import copy
+import itertools
+import random
+import time
+
+import numpy as np
+
+from .indicator_cache import compute_indicator, indicator_cache, indicator_key
+from .parallel import run_parallel
+from .portfolio import PortfolioSimulator
+
+# Metrics a sweep can be ranked by; higher is better for all of them
+RANK_METRICS = ("cum_return", "sharpe_ratio", "max_drawdown", "final_value")
+
+DEFAULT_INDICATORS = {
+    "bbp": {"lookback": 10},
+    "rsi": {"lookback": 10},
+    "macd": {"short_period": 12, "long_period": 26},
+}
+
+
+def expand_grid(param_grid):
+    """
+    Expand a parameter grid into every combination of its values.
+
+    Args:
+        param_grid (dict): Parameter name to list of candidate values.
+
+    Returns:
+        list of dict: One dict per combination, parameters in sorted name order.
+    """
+    names = sorted(param_grid)
+    return [
+        dict(zip(names, values))
+        for values in itertools.product(*(param_grid[name] for name in names))
+    ]
+
+
+def precompute_indicators(price_frames, indicators_with_params):
+    """
+    Compute every indicator over every price frame once.
+
+    Args:
+        price_frames (list of pandas.DataFrame): Outputs of ``utility.process_data``.
+        indicators_with_params (dict): Indicator name to parameter dict.
+
+    Returns:
+        list of tuple: ``(indicator_key, frame)`` pairs for seeding an indicator
+            cache.
+    """
+    entries = []
+    for prices in price_frames:
+        for name, params in indicators_with_params.items():
+            entries.append(
+                (
+                    indicator_key(name, prices, params),
+                    compute_indicator(name, prices, params),
+                )
+            )
+    return entries
+
+
+class SweepContext(object):
+    """
+    Everything a worker needs to evaluate one parameter combination.
+
+    Args:
+        model_class (type): Trader class, e.g. ``QLearningTrader``.
+        base_kwargs (dict): Constructor arguments shared by all combinations.
+        symbol (str): Stock symbol.
+        prices_train (pandas.DataFrame): Training period prices.
+        prices_test (pandas.DataFrame): Test period prices.
+        indicators_with_params (dict): Indicator name to parameter dict.
+        start_val (float, optional): Starting portfolio value.
+        seed (int, optional): Seed applied to the global random generators before
+            each combination, making results independent of scheduling.
+        indicator_entries (list of tuple, optional): Output of
+            ``precompute_indicators``, loaded into each worker's indicator cache.
+    """
+
+    def __init__(
+        self,
+        model_class,
+        base_kwargs,
+        symbol,
+        prices_train,
+        prices_test,
+        indicators_with_params,
+        start_val=100000,
+        seed=None,
+        indicator_entries=(),
+    ):
+        self.model_class = model_class
+        self.base_kwargs = base_kwargs
+        self.symbol = symbol
+        self.prices_train = prices_train
+        self.prices_test = prices_test
+        self.indicators_with_params = indicators_with_params
+        self.start_val = start_val
+        self.seed = seed
+        self.indicator_entries = list(indicator_entries)
+
+    def setup(self):
+        for key, frame in self.indicator_entries:
+            indicator_cache.put(key, frame)
+
+    def run(self, params):
+        """
+        Train and test one combination.
+
+        Args:
+            params (dict): Constructor arguments overriding ``base_kwargs``.
+
+        Returns:
+            dict: Test period metrics plus the training and testing time in
+                seconds (``elapsed``).
+        """
+        if self.seed is not None:
+            random.seed(self.seed)
+            np.random.seed(self.seed)
+        kwargs = dict(self.base_kwargs, **params)
+        model = self.model_class(**kwargs)
+        start = time.perf_counter()
+        model.train_model(
+            symbol=self.symbol,
+            sd=self.prices_train.index[0],
+            ed=self.prices_train.index[-1],
+            sv=self.start_val,
+            # Traders may normalize parameters in place
+            indicators_with_params=copy.deepcopy(self.indicators_with_params),
+            prices=self.prices_train,
+        )
+        trades = model.test_model(
+            symbol=self.symbol,
+            sd=self.prices_test.index[0],
+            ed=self.prices_test.index[-1],
+            prices=self.prices_test,
+        )
+        simulator = PortfolioSimulator(
+            self.prices_test[self.symbol],
+            start_val=self.start_val,
+            commission=kwargs.get("commission", 0.0),
+            impact=kwargs.get("impact", 0.0),
+        )
+        metrics = simulator.summary(trades[self.symbol])
+        metrics["elapsed"] = time.perf_counter() - start
+        return metrics
+
+
+def ranked_sweep(context, combinations, rank_by="cum_return", **kwargs):
+    """
+    Run a sweep and describe its progress as a stream of events.
+
+    Args:
+        context (SweepContext): Shared sweep inputs.
+        combinations (list of dict): Output of ``expand_grid``.
+        rank_by (str, optional): Metric from ``RANK_METRICS`` to rank by.
+        **kwargs: Passed on to ``parallel.run_parallel``.
+
+    Yields:
+        dict: A "start" event, one "result" (with the combination's current rank)
+            or "error" event per combination, and a final "done" event holding the
+            full ranked table.
+    """
+    total = len(combinations)
+    yield {"event": "start", "total": total, "rank_by": rank_by}
+    order = []  # sorted (-score, index) of finished combinations
+    results = {}
+    completed = 0
+    for index, metrics, error in run_parallel(context, combinations, **kwargs):
+        completed += 1
+        if error is not None:
+            yield {
+                "event": "error",
+                "index": index,
+                "completed": completed,
+                "total": total,
+                "params": combinations[index],
+                "error": error,
+            }
+            continue
+        score = metrics[rank_by]
+        entry = (-score if np.isfinite(score) else np.inf, index)
+        bisect.insort(order, entry)
+        results[index] = metrics
+        yield {
+            "event": "result",
+            "index": index,
+            "rank": bisect.bisect_left(order, entry) + 1,
+            "completed": completed,
+            "total": total,
+            "params": combinations[index],
+            "metrics": metrics,
+        }
+    yield {
+        "event": "done",
+        "completed": completed,
+        "total": total,
+        "ranking": [
+            {
+                "rank": rank,
+                "index": index,
+                "params": combinations[index],
+                "metrics": results[index],
+            }
+            for rank, (_, index) in enumerate(order, start=1)
+        ],
+    }
@@ -0,0 +1,212 @@
+"""
+symbol_catalog.py: In-memory index of the symbols in the price data directory.
+
+The catalog is built once at startup and records, for each ``<symbol>.csv``, its
+path, first and last trading date, row count, file size and modification time.
+Endpoints answer symbol listings and date range checks from memory; a rescan only
+stats the files and reloads the ones whose size or modification time changed, and
+publishes the result as a new snapshot, so readers never wait for a rescan.
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+from .price_store import _to_datetime64, get_price_store
+
+DEFAULT_REFRESH_SECONDS = float(os.environ.get("SYMBOL_CATALOG_REFRESH_SECONDS", 60))
+
+
+class SymbolInfo(object):
+    """
+    Catalog entry of one symbol.
+
+    Attributes:
+        symbol (str): Stock symbol.
+        path (str): CSV file path.
+        first_date (numpy.datetime64): First trading date, None if the file is empty.
+        last_date (numpy.datetime64): Last trading date, None if the file is empty.
+        rows (int): Number of trading days.
+        size (int): File size in bytes.
+        mtime_ns (int): File modification time in nanoseconds.
+    """
+
+    __slots__ = (
+        "symbol",
+        "path",
+        "first_date",
+        "last_date",
+        "rows",
+        "size",
+        "mtime_ns",
+    )
+
+    def __init__(self, symbol, path, first_date, last_date, rows, size, mtime_ns):
+        self.symbol = symbol
+        self.path = path
+        self.first_date = first_date
+        self.last_date = last_date
+        self.rows = rows
+        self.size = size
+        self.mtime_ns = mtime_ns
+
+    def overlaps(self, start=None, end=None):
+        """
+        Check whether ``start <= date <= end`` overlaps the stored date span.
+
+        Args:
+            start (datetime-like, optional): Inclusive start date.
+            end (datetime-like, optional): Inclusive end date.
+
+        Returns:
+            bool: False if the range lies entirely before the first or after the
+                last trading date, or the symbol has no data.
+        """
+        if self.rows == 0:
+            return False
+        if start is not None and _to_datetime64(start) > self.last_date:
+            return False
+        if end is not None and _to_datetime64(end) < self.first_date:
+            return False
+        return True
+
+    def to_dict(self):
+        return {
+            "symbol": self.symbol,
+            "first_date": _format_date(self.first_date),
+            "last_date": _format_date(self.last_date),
+            "rows": self.rows,
+            "size": self.size,
+            "modified": self.mtime_ns / 1e9,
+        }
+
+
+def _format_date(value):
+    return None if value is None else str(np.datetime_as_string(value, unit="D"))
+
+
+class SymbolCatalog(object):
+    """
+    Symbol index of a price store's data directory.
+
+    Args:
+        store (PriceStore, optional): Store whose CSV files are indexed and used to
+            read their dates; defaults to the shared store.
+        refresh_seconds (float, optional): Minimum time between automatic rescans
+            in ``maybe_refresh``.
+    """
+
+    def __init__(self, store=None, refresh_seconds=DEFAULT_REFRESH_SECONDS):
+        self.store = store or get_price_store()
+        self.refresh_seconds = refresh_seconds
+        # Entries by symbol and the sorted symbols, replaced together by a rescan
+        self._snapshot = ({}, [])
+        self._scanned_at = None
+        self._lock = threading.Lock()
+
+    def __contains__(self, symbol):
+        return symbol in self._snapshot[0]
+
+    def __len__(self):
+        return len(self._snapshot[0])
+
+    def get(self, symbol):
+        return self._snapshot[0].get(symbol)
+
+    def symbols(self):
+        """Sorted list of cataloged symbols."""
+        return self._snapshot[1]
+
+    def entries(self):
+        """Catalog entries sorted by symbol."""
+        entries, symbols = self._snapshot
+        return [entries[symbol] for symbol in symbols]
+
+    def refresh(self):
+        """
+        Rescan the data directory, reloading only new or changed files.
+
+        Returns:
+            dict: Lists of added, updated and removed symbols.
+        """
+        with self._lock:
+            seen = {}
+            with os.scandir(self.store.data_dir) as it:
+                for dir_entry in it:
+                    if not dir_entry.name.endswith(".csv") or not dir_entry.is_file():
+                        continue
+                    stat = dir_entry.stat()
+                    seen[dir_entry.name[: -len(".csv")]] = (dir_entry.path, stat)
+
+            added, updated = [], []
+            entries = dict(self._snapshot[0])
+            for symbol, (path, stat) in seen.items():
+                current = entries.get(symbol)
+                if (
+                    current is not None
+                    and current.size == stat.st_size
+                    and current.mtime_ns == stat.st_mtime_ns
+                ):
+                    continue
+                try:
+                    entries[symbol] = self._index(symbol, path, stat)
+                except Exception:
+                    # Unreadable files are left out until they change again
+                    entries.pop(symbol, None)
+                    continue
+                (added if current is None else updated).append(symbol)
+            removed = [symbol for symbol in entries if symbol not in seen]
+            for symbol in removed:
+                del entries[symbol]
+
+            self._snapshot = (entries, sorted(entries))
+            self._scanned_at = time.monotonic()
+        return {"added": added, "updated": updated, "removed": removed}
+
+    def maybe_refresh(self):
+        """Rescan if the last scan is older than ``refresh_seconds``."""
+        if (
+            self._scanned_at is None
+            or time.monotonic() - self._scanned_at >= self.refresh_seconds
+        ):
+            self.refresh()
+
+    def _index(self, symbol, path, stat):
+        prices = self.store.load(symbol)
+        rows = len(prices)
+        return SymbolInfo(
+            symbol,
+            path,
+            prices.dates[0] if rows else None,
+            prices.dates[-1] if rows else None,
+            rows,
+            stat.st_size,
+            stat.st_mtime_ns,
+        )
+
+
+_default_catalog = None
+_default_lock = threading.Lock()
+
+
+def get_symbol_catalog():
+    """
+    Return the shared catalog of the default price store.
+
+    The first call scans the data directory; later calls return the current
+    snapshot without touching the disk. Rescans are left to the caller, e.g. a
+    background task calling ``maybe_refresh``.
+
+    Returns:
+        SymbolCatalog: Process-wide catalog.
+    """
+    global _default_catalog
+    if _default_catalog is None:
+        with _default_lock:
+            if _default_catalog is None:
+                catalog = SymbolCatalog()
+                catalog.refresh()
+                _default_catalog = catalog
+    return _default_catalog
@@ -0,0 +1,241 @@
+"""
+universe.py: Parallel backtests of one strategy across many symbols.
+
+A strategy is either a single trained model, shipped to every worker process once
+as its exported state, or a recipe that trains a fresh model per symbol. Symbols are
+fed to the workers through a bounded window of in-flight tasks and only running
+summary statistics are kept, so memory use does not grow with the universe size.
+"""
+
+import copy
+import math
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+from . import utility
+from .parallel import run_parallel
+from .portfolio import PortfolioSimulator
+
+
+class UniverseContext(object):
+    """
+    Everything a worker needs to backtest one symbol.
+
+    Args:
+        model_class (type): Trader class, e.g. ``QLearningTrader``.
+        test_dates (tuple): ``(start, end)`` of the test period.
+        model_state (tuple, optional): ``(meta, arrays)`` from a trained model's
+            ``get_state``; the same model is tested on every symbol.
+        model_kwargs (dict, optional): Constructor arguments used to train a new
+            model per symbol when ``model_state`` is None.
+        train_dates (tuple, optional): ``(start, end)`` of the per-symbol
+            training period.
+        indicators_with_params (dict, optional): Indicators for per-symbol
+            training.
+        start_val (float, optional): Starting portfolio value.
+        commission (float, optional): Commission per trade.
+        impact (float, optional): Market impact factor.
+        seed (int, optional): Seed applied to the global random generators before
+            each symbol.
+    """
+
+    def __init__(
+        self,
+        model_class,
+        test_dates,
+        model_state=None,
+        model_kwargs=None,
+        train_dates=None,
+        indicators_with_params=None,
+        start_val=100000,
+        commission=0.0,
+        impact=0.0,
+        seed=None,
+    ):
+        self.model_class = model_class
+        self.test_dates = test_dates
+        self.model_state = model_state
+        self.model_kwargs = model_kwargs
+        self.train_dates = train_dates
+        self.indicators_with_params = indicators_with_params
+        self.start_val = start_val
+        self.commission = commission
+        self.impact = impact
+        self.seed = seed
+        self._model = None
+
+    def __getstate__(self):
+        # Workers rebuild the trained model from its state, not from a pickle
+        state = self.__dict__.copy()
+        state["_model"] = None
+        return state
+
+    def setup(self):
+        pass
+
+    def get_model(self, symbol):
+        """
+        Return the model to test on ``symbol``, training one if using a recipe.
+
+        Args:
+            symbol (str): Stock symbol.
+
+        Returns:
+            A trained trader.
+        """
+        if self.model_state is not None:
+            if self._model is None:
+                self._model = self.model_class.from_state(*self.model_state)
+            return self._model
+        if self.seed is not None:
+            random.seed(self.seed)
+            np.random.seed(self.seed)
+        model = self.model_class(**self.model_kwargs)
+        model.train_model(
+            symbol=symbol,
+            sd=self.train_dates[0],
+            ed=self.train_dates[1],
+            sv=self.start_val,
+            # Traders may normalize parameters in place
+            indicators_with_params=copy.deepcopy(self.indicators_with_params),
+        )
+        return model
+
+    def run(self, symbol):
+        """
+        Backtest one symbol over the test period.
+
+        Args:
+            symbol (str): Stock symbol.
+
+        Returns:
+            dict: Test period metrics, the buy-and-hold benchmark's cumulative
+                return and the elapsed time in seconds.
+        """
+        start = time.perf_counter()
+        model = self.get_model(symbol)
+        prices = utility.process_data(symbol, pd.date_range(*self.test_dates))
+        if prices.shape[0] < 2:
+            raise ValueError(f"Not enough price data for {symbol} in the test period")
+        trades = model.test_model(
+            symbol=symbol, sd=self.test_dates[0], ed=self.test_dates[1], prices=prices
+        )
+        simulator = PortfolioSimulator(
+            prices[symbol],
+            start_val=self.start_val,
+            commission=self.commission,
+            impact=self.impact,
+        )
+        metrics = simulator.summary(trades[symbol])
+        # Benchmark: buy 1000 shares on the first day and hold
+        trades_benchmark = np.zeros(prices.shape[0])
+        trades_benchmark[0] = 1000
+        metrics["benchmark_cum_return"] = float(
+            simulator.cumulative_return(trades_benchmark)
+        )
+        metrics["elapsed"] = time.perf_counter() - start
+        return metrics
+
+
+class RunningStats(object):
+    """
+    Constant-memory summary of per-symbol results.
+
+    Tracks the mean and standard deviation of cumulative returns and Sharpe ratios
+    (Welford's algorithm), the best and worst symbol, and how often the strategy
+    made money or beat buy-and-hold.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.failed = 0
+        self.positive = 0
+        self.beat_benchmark = 0
+        self._moments = {"cum_return": [0.0, 0.0], "sharpe_ratio": [0.0, 0.0]}
+        self.best = None
+        self.worst = None
+
+    def add(self, symbol, metrics):
+        self.count += 1
+        for name, moments in self._moments.items():
+            delta = metrics[name] - moments[0]
+            moments[0] += delta / self.count
+            moments[1] += delta * (metrics[name] - moments[0])
+        cum_return = metrics["cum_return"]
+        self.positive += cum_return > 0
+        self.beat_benchmark += cum_return > metrics["benchmark_cum_return"]
+        if self.best is None or cum_return > self.best[1]:
+            self.best = (symbol, cum_return)
+        if self.worst is None or cum_return < self.worst[1]:
+            self.worst = (symbol, cum_return)
+
+    def to_dict(self):
+        """
+        Return the summary as plain JSON-serializable values.
+
+        Returns:
+            dict: Counts, means, standard deviations, hit rates and extremes.
+        """
+        summary = {"symbols": self.count, "failed": self.failed}
+        for name, (mean, m2) in self._moments.items():
+            summary[f"mean_{name}"] = mean if self.count else None
+            summary[f"std_{name}"] = (
+                math.sqrt(m2 / (self.count - 1)) if self.count > 1 else None
+            )
+        summary["positive_rate"] = self.positive / self.count if self.count else None
+        summary["beat_benchmark_rate"] = (
+            self.beat_benchmark / self.count if self.count else None
+        )
+        summary["best"] = (
+            {"symbol": self.best[0], "cum_return": self.best[1]} if self.best else None
+        )
+        summary["worst"] = (
+            {"symbol": self.worst[0], "cum_return": self.worst[1]}
+            if self.worst
+            else None
+        )
+        return summary
+
+
+def universe_events(context, symbols, **kwargs):
+    """
+    Run a universe backtest and describe its progress as a stream of events.
+
+    Args:
+        context (UniverseContext): Shared backtest inputs.
+        symbols (list of str): Symbols to backtest.
+        **kwargs: Passed on to ``parallel.run_parallel``.
+
+    Yields:
+        dict: A "start" event, one "result" or "error" event per symbol, and a
+            final "done" event holding the summary statistics.
+    """
+    total = len(symbols)
+    stats = RunningStats()
+    yield {"event": "start", "total": total}
+    completed = 0
+    for index, metrics, error in run_parallel(context, symbols, **kwargs):
+        symbol = symbols[index]
+        completed += 1
+        if error is not None:
+            stats.failed += 1
+            yield {
+                "event": "error",
+                "symbol": symbol,
+                "completed": completed,
+                "total": total,
+                "error": error,
+            }
+            continue
+        stats.add(symbol, metrics)
+        yield {
+            "event": "result",
+            "symbol": symbol,
+            "completed": completed,
+            "total": total,
+            "metrics": metrics,
+        }
+    yield {"event": "done", "completed": completed, "summary": stats.to_dict()}
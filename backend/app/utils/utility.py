@@ -5,7 +5,11 @@ This module provides functions for data processing, indicator normalization, and
 """
 
 import os
+import numpy as np
 import pandas as pd
+from .price_store import LOAD_MAX_WORKERS, get_price_store
+from .portfolio import PortfolioSimulator
+from .metrics import stage_timer
 
 
 def all_y_same(data_y):
@@ -46,6 +50,107 @@ def symbol_to_path(symbol, base_dir=None):
     return os.path.join(base_dir, f"{symbol}.csv")
 
 
+def trading_calendar(dates, calendar_symbol="SPY", col_name="Adj Close"):
+    """
+    Trading days among the given dates, as defined by a reference symbol.
+
+    The reference symbol's dates come from the price store's memory map, so the
+    calendar file is parsed only once per process.
+
+    Args:
+        dates (pandas.DatetimeIndex): Candidate dates.
+        calendar_symbol (str, optional): Symbol whose trading days are used.
+            Defaults to "SPY".
+        col_name (str, optional): Column that must hold a value for a day to count.
+
+    Returns:
+        numpy.ndarray: Sorted ``datetime64[ns]`` trading days.
+    """
+    target_dates = pd.DatetimeIndex(dates).tz_localize(None).values
+    target_dates = target_dates.astype("datetime64[ns]")
+    calendar = get_price_store().load(calendar_symbol)
+    values = calendar.align(target_dates, col_name)
+    return target_dates[~np.isnan(values)]
+
+
+def load_panel(
+    symbols,
+    dates,
+    col_name="Adj Close",
+    calendar_symbol="SPY",
+    fill=True,
+    max_workers=None,
+):
+    """
+    Load many symbols into one dates x symbols price panel.
+
+    Symbols are read concurrently from the price store and gathered column by
+    column into a single preallocated matrix aligned to the trading calendar.
+
+    Args:
+        symbols (list of str): Stock symbols, in column order.
+        dates (pandas.DatetimeIndex): Date range for the data.
+        col_name (str, optional): Column to load. Defaults to "Adj Close".
+        calendar_symbol (str, optional): Symbol defining the trading days; the
+            requested dates are kept as they are if None. Defaults to "SPY".
+        fill (bool, optional): Forward- then back-fill missing values in place.
+            Defaults to True.
+        max_workers (int, optional): Loader threads; defaults to the price store's
+            ``PRICE_LOAD_MAX_WORKERS``.
+
+    Returns:
+        pandas.DataFrame: Float64 prices indexed by trading day, one column per
+            symbol, backed by the panel matrix without a copy.
+    """
+    with stage_timer("load_panel") as timer:
+        if calendar_symbol is None:
+            index = pd.DatetimeIndex(dates).tz_localize(None)
+            target_dates = index.values.astype("datetime64[ns]")
+        else:
+            target_dates = trading_calendar(dates, calendar_symbol, col_name)
+            index = pd.DatetimeIndex(target_dates)
+        store = get_price_store()
+        symbols = list(symbols)
+        loaded = store.load_many(symbols, max_workers=max_workers or LOAD_MAX_WORKERS)
+        panel = np.empty((target_dates.shape[0], len(symbols)), order="F")
+        for j, prices in enumerate(loaded):
+            panel[:, j] = prices.align(target_dates, col_name)
+        if fill:
+            fill_missing(panel)
+        timer.rows = panel.size
+    return pd.DataFrame(panel, index=index, columns=symbols, copy=False)
+
+
+def fill_missing(panel):
+    """
+    Forward-fill, then back-fill, the NaNs of each column of a matrix in place.
+
+    Args:
+        panel (numpy.ndarray): Float matrix of shape (dates, symbols).
+
+    Returns:
+        numpy.ndarray: ``panel``, with values only missing in all-NaN columns.
+    """
+    n = panel.shape[0]
+    missing = np.isnan(panel)
+    if n == 0 or not missing.any():
+        return panel
+    # Column-major positions, so a cell's column offset is ``column * n``
+    flat = panel.reshape(-1, order="F")
+    offsets = np.arange(panel.shape[1]) * n
+    # Last valid row at or before each cell (row 0 before the first valid one)
+    last_valid = np.where(missing, 0, np.arange(n)[:, None])
+    np.maximum.accumulate(last_valid, axis=0, out=last_valid)
+    last_valid += offsets
+    panel[missing] = flat[last_valid[missing]]
+    # Only leading NaNs remain; take each column's first valid row for them
+    missing = np.isnan(panel)
+    if missing.any():
+        first_valid = np.argmax(~missing, axis=0) + offsets
+        panel[missing] = flat[np.broadcast_to(first_valid, panel.shape)[missing]]
+    return panel
+
+
 def get_data(symbols, dates, add_spy=True, col_name="Adj Close"):
     """
     Load historical stock data for the given symbols and dates, optionally adding SPY data for reference.
@@ -59,24 +164,18 @@ def get_data(symbols, dates, add_spy=True, col_name="Adj Close"):
     Returns:
         pandas.DataFrame: DataFrame containing the stock data, indexed by date.
     """
-    df = pd.DataFrame(index=dates)
-    df.index = df.index.tz_localize(None)
-    # print("DEBUG: df index tz before join:", df.index.tz)
-    if add_spy and "SPY" not in symbols:
-        symbols = ["SPY"] + list(symbols)
-    for symbol in symbols:
-        df_temp = pd.read_csv(
-            symbol_to_path(symbol),
-            index_col="Date",
-            parse_dates=True,
-            usecols=["Date", col_name],
-            na_values=["nan"],
+    with stage_timer("get_data") as timer:
+        if add_spy and "SPY" not in symbols:
+            symbols = ["SPY"] + list(symbols)
+        # Dates are limited to SPY trading days whenever SPY is among the columns
+        df = load_panel(
+            symbols,
+            dates,
+            col_name=col_name,
+            calendar_symbol="SPY" if "SPY" in symbols else None,
+            fill=False,
         )
-        df_temp = df_temp.rename(columns={col_name: symbol})
-        # print(f"DEBUG: df_temp index tz for {symbol}:", df_temp.index.tz)
-        df = df.join(df_temp)
-        if symbol == "SPY":
-            df = df.dropna(subset=["SPY"])
+        timer.rows = df.size
     return df
 
 
@@ -91,15 +190,8 @@ def process_data(symbol, dates):
     Returns:
         pandas.DataFrame: Processed stock price data.
     """
-    prices_train = get_data([symbol], dates)
-
-    if symbol != "SPY":
-        prices_train = prices_train.drop("SPY", axis=1)
-
-    prices_train.ffill(inplace=True)
-    prices_train.bfill(inplace=True)
-
-    return prices_train
+    # SPY only provides the trading calendar, so it is not loaded as a column
+    return load_panel([symbol], dates, fill=True)
 
 
 def normalize_indicator(indicator, indicator_name="", scaler_map=None):
@@ -109,12 +201,13 @@ def normalize_indicator(indicator, indicator_name="", scaler_map=None):
     Args:
         indicator (pandas.DataFrame): Technical indicator values to normalize.
         indicator_name (str, optional): Name of the indicator.
-        scaler_map (dict, optional): Existing scaler map for normalization.
+        scaler_map (dict, optional): Existing scaler map for normalization; bounds
+            stored for ``indicator_name`` are reused, otherwise they are fitted.
 
     Returns:
         tuple: (normalized indicator DataFrame, min value, max value)
     """
-    if len(scaler_map) != 3:
+    if indicator_name not in scaler_map:
         indicator_min = indicator.min()
         indicator_max = indicator.max()
     else:
@@ -124,12 +217,103 @@ def normalize_indicator(indicator, indicator_name="", scaler_map=None):
     return indicator_norm, indicator_min, indicator_max
 
 
+def coerce_indicator_params(indicators_with_params):
+    """
+    Convert indicator parameters to int where possible, as the traders do.
+
+    Args:
+        indicators_with_params (dict): Indicator name to parameter dict.
+
+    Returns:
+        dict: A converted copy.
+    """
+    coerced = {}
+    for name, params in indicators_with_params.items():
+        coerced[name] = {}
+        for k, v in params.items():
+            try:
+                coerced[name][k] = int(v)
+            except (ValueError, TypeError):
+                coerced[name][k] = v
+    return coerced
+
+
+def serialize_scaler_map(scaler_map):
+    """
+    Convert a scaler map into JSON-serializable form.
+
+    Args:
+        scaler_map (dict): Indicator name to ``[min, max]``, where each bound is a
+            scalar or a pandas Series keyed by indicator column.
+
+    Returns:
+        dict: Indicator name to ``[min, max]`` with Series converted to dicts.
+    """
+    return {
+        name: [
+            bound.to_dict() if isinstance(bound, pd.Series) else float(bound)
+            for bound in bounds
+        ]
+        for name, bounds in scaler_map.items()
+    }
+
+
+def deserialize_scaler_map(data):
+    """
+    Restore a scaler map produced by ``serialize_scaler_map``.
+
+    Args:
+        data (dict): Serialized scaler map.
+
+    Returns:
+        dict: Indicator name to ``[min, max]`` with dict bounds as pandas Series.
+    """
+    return {
+        name: [
+            pd.Series(bound, dtype=np.float64) if isinstance(bound, dict) else bound
+            for bound in bounds
+        ]
+        for name, bounds in data.items()
+    }
+
+
+def scaler_bounds(scaler_map, indicator_names):
+    """
+    Flatten a scaler map into per-column min and max arrays.
+
+    Args:
+        scaler_map (dict): Indicator name to ``[min, max]``, each a scalar or a
+            pandas Series keyed by indicator column.
+        indicator_names (iterable of str): Indicators in feature order.
+
+    Returns:
+        tuple: ``(mins, maxs, widths)`` where ``mins`` and ``maxs`` hold one entry
+            per indicator column, in order, and ``widths`` the number of columns of
+            each indicator.
+    """
+    mins, maxs, widths = [], [], []
+    for name in indicator_names:
+        bound_min, bound_max = [
+            np.atleast_1d(
+                bound.to_numpy() if isinstance(bound, pd.Series) else bound
+            ).astype(np.float64)
+            for bound in scaler_map[name]
+        ]
+        mins.append(bound_min)
+        maxs.append(bound_max)
+        widths.append(bound_min.shape[0])
+    return np.concatenate(mins), np.concatenate(maxs), widths
+
+
 def compute_portvals(
     trades, start_val=100000, commission=9.95, impact=0.005, symbol="JPM"
 ):
     """
     Compute the portfolio value over time based on a series of trades, taking into account commission and market impact.
 
+    The ``trades`` frame is not modified. For repeated evaluations over the same
+    period, build a ``PortfolioSimulator`` once instead.
+
     Args:
         trades (pandas.DataFrame): DataFrame containing trade information.
         start_val (float, optional): Starting portfolio value. Defaults to 100000.
@@ -140,34 +324,17 @@ def compute_portvals(
     Returns:
         pandas.DataFrame: DataFrame containing portfolio values over time.
     """
-    start_date = trades.index[0]
-    end_date = trades.index[-1]
-    prices = process_data(symbol, pd.date_range(start_date, end_date))
-    prices["CASH"] = 1.0
-
-    # create Trades dataframe
-    trades["CASH"] = 0.0
-    trades.loc[(trades[symbol] != 0.0), ["CASH"]] = (
-        prices[symbol] * trades[symbol] * (-1.0)
-        - commission
-        - prices[symbol] * impact * abs(trades[symbol])
-    )
-
-    # create Holdings dataframe
-    holdings_ = prices.copy()
-    holdings_.iloc[:, :] = 0.0
-    # holdings_['CASH'].iloc[0] = start_val
-    holdings_.loc[holdings_.index[0], "CASH"] = start_val
-    holdings_ += trades
-    holdings = holdings_.expanding(1).sum()
-
-    # create Values dataframe
-    values = prices.copy()
-    values.iloc[:, :] = 0.0
-    values = prices * holdings
-    port_vals = values.sum(axis=1)
-    port_vals_df = pd.DataFrame(
-        data=port_vals.values, index=port_vals.index, columns=["p_VALUE"]
-    )
+    with stage_timer("compute_portvals", rows=len(trades)):
+        start_date = trades.index[0]
+        end_date = trades.index[-1]
+        prices = process_data(symbol, pd.date_range(start_date, end_date))
+        simulator = PortfolioSimulator(
+            prices[symbol], start_val=start_val, commission=commission, impact=impact
+        )
+        symbol_trades = trades[symbol].reindex(prices.index, fill_value=0.0)
+        port_vals = simulator.evaluate(symbol_trades)
+        port_vals_df = pd.DataFrame(
+            data=port_vals, index=prices.index, columns=["p_VALUE"]
+        )
 
     return port_vals_df
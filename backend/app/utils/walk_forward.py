@@ -0,0 +1,228 @@
+"""
+walk_forward.py: Walk-forward evaluation over rolling train/test windows.
+
+Prices and raw indicator values are computed once for the full span and each window
+trains and tests on date slices of them, so a window only costs its own model fit.
+Windows run concurrently and their out-of-sample trades are stitched into a single
+equity curve.
+"""
+
+import copy
+import random
+import time
+
+import numpy as np
+
+from .indicator_cache import compute_indicator
+from .parallel import run_parallel
+from .portfolio import PortfolioSimulator, portfolio_stats
+
+
+def generate_windows(n_days, train_days, test_days, step_days=None, anchored=False):
+    """
+    Split ``n_days`` rows into consecutive train/test windows.
+
+    Args:
+        n_days (int): Number of trading days in the full span.
+        train_days (int): Trading days in each training window.
+        test_days (int): Trading days in each test window.
+        step_days (int, optional): Days between window starts; defaults to
+            ``test_days`` so test periods tile the span.
+        anchored (bool, optional): Grow every training window from the first day
+            instead of rolling it forward.
+
+    Returns:
+        list of tuple: ``(train_lo, train_hi, test_lo, test_hi)`` row ranges with
+            exclusive upper bounds.
+
+    Raises:
+        ValueError: If a window size is not positive.
+    """
+    step_days = step_days or test_days
+    if min(train_days, test_days, step_days) <= 0:
+        raise ValueError("Window sizes must be positive")
+    windows = []
+    start = 0
+    while start + train_days + test_days <= n_days:
+        test_lo = start + train_days
+        windows.append(
+            (0 if anchored else start, test_lo, test_lo, test_lo + test_days)
+        )
+        start += step_days
+    return windows
+
+
+class WalkForwardContext(object):
+    """
+    Full-span inputs shared by every walk-forward window.
+
+    Args:
+        model_class (type): Trader class, e.g. ``QLearningTrader``.
+        model_kwargs (dict): Constructor arguments of each window's model.
+        symbol (str): Stock symbol.
+        prices (pandas.DataFrame): Output of ``utility.process_data`` over the full
+            span.
+        indicators_with_params (dict): Indicator name to parameter dict, with
+            parameters already converted as the traders do.
+        start_val (float, optional): Starting portfolio value.
+        seed (int, optional): Seed applied to the global random generators before
+            each window.
+    """
+
+    def __init__(
+        self,
+        model_class,
+        model_kwargs,
+        symbol,
+        prices,
+        indicators_with_params,
+        start_val=100000,
+        seed=None,
+    ):
+        self.model_class = model_class
+        self.model_kwargs = model_kwargs
+        self.symbol = symbol
+        self.prices = prices
+        self.indicators_with_params = indicators_with_params
+        self.start_val = start_val
+        self.seed = seed
+        self.indicators = {
+            name: compute_indicator(name, prices, params)
+            for name, params in indicators_with_params.items()
+        }
+
+    def setup(self):
+        pass
+
+    def _slice(self, lo, hi):
+        prices = self.prices.iloc[lo:hi]
+        # Indicator frames may have dropped warm-up rows (e.g. ROC), so their row
+        # positions do not match the prices; slicing by date keeps later rows out
+        start, end = prices.index[0], prices.index[-1]
+        indicators = {name: df.loc[start:end] for name, df in self.indicators.items()}
+        return prices, indicators
+
+    def run(self, window):
+        """
+        Train on a window's training rows and trade its test rows.
+
+        Args:
+            window (tuple): ``(train_lo, train_hi, test_lo, test_hi)`` row ranges.
+
+        Returns:
+            tuple: Test period trades as a float64 array and the elapsed time in
+                seconds.
+        """
+        start = time.perf_counter()
+        if self.seed is not None:
+            random.seed(self.seed)
+            np.random.seed(self.seed)
+        train_lo, train_hi, test_lo, test_hi = window
+        model = self.model_class(**self.model_kwargs)
+        prices_train, indicators_train = self._slice(train_lo, train_hi)
+        model.train_model(
+            symbol=self.symbol,
+            sd=prices_train.index[0],
+            ed=prices_train.index[-1],
+            sv=self.start_val,
+            # Traders may normalize parameters in place
+            indicators_with_params=copy.deepcopy(self.indicators_with_params),
+            prices=prices_train,
+            indicators=indicators_train,
+        )
+        prices_test, indicators_test = self._slice(test_lo, test_hi)
+        trades = model.test_model(
+            symbol=self.symbol,
+            sd=prices_test.index[0],
+            ed=prices_test.index[-1],
+            prices=prices_test,
+            indicators=indicators_test,
+        )
+        trades_arr = trades[self.symbol].to_numpy(dtype=np.float64)
+        return trades_arr, time.perf_counter() - start
+
+
+def walk_forward(context, windows, commission=0.0, impact=0.0, max_workers=None):
+    """
+    Evaluate every window and stitch the out-of-sample results.
+
+    Where test periods overlap, each window trades only until the next window's
+    test period begins. The position held at a window boundary is carried into the
+    next window, or closed if a gap separates them, and the stitched trades are
+    valued as one portfolio against buy-and-hold over the whole span.
+
+    Args:
+        context (WalkForwardContext): Full-span inputs.
+        windows (list of tuple): Output of ``generate_windows``.
+        commission (float, optional): Commission per trade.
+        impact (float, optional): Market impact factor.
+        max_workers (int, optional): Worker processes for the windows.
+
+    Returns:
+        dict: Per-window dates and metrics, the stitched out-of-sample dates with
+            normalized model and buy-and-hold benchmark values, and metrics of the
+            stitched model curve.
+
+    Raises:
+        ValueError: If there are no windows.
+        RuntimeError: If any window fails.
+    """
+    if not windows:
+        raise ValueError("The date range is too short for a single window")
+    results = [None] * len(windows)
+    for index, result, error in run_parallel(context, windows, max_workers=max_workers):
+        if error is not None:
+            raise RuntimeError(f"Walk-forward window {index} failed: {error}")
+        results[index] = result
+
+    dates = context.prices.index
+    # Each window trades from a flat position, so its trades are turned into target
+    # holdings and the stitched trades are the changes between them. A position is
+    # carried into the next window, paying only for the shares that change hands,
+    # and closed on the last day of a window followed by a gap.
+    rows, holding_parts, bounds = [], [], []
+    for index, (_, _, test_lo, test_hi) in enumerate(windows):
+        end = test_hi
+        if index + 1 < len(windows):
+            end = min(test_hi, windows[index + 1][2])
+        holdings = np.cumsum(results[index][0][: end - test_lo])
+        if index + 1 < len(windows) and windows[index + 1][2] > end:
+            holdings[-1] = 0.0
+        bounds.append((len(rows), len(rows) + end - test_lo))
+        rows.extend(range(test_lo, end))
+        holding_parts.append(holdings)
+    trades = np.diff(np.concatenate(holding_parts), prepend=0.0)
+    prices = context.prices[context.symbol].to_numpy(dtype=np.float64)[rows]
+    simulator = PortfolioSimulator(
+        prices, start_val=context.start_val, commission=commission, impact=impact
+    )
+    model_curve = simulator.evaluate(trades)
+    # Buy-and-hold over the whole stitched span
+    trades_benchmark = np.zeros(len(rows))
+    trades_benchmark[0] = 1000
+    benchmark_curve = simulator.evaluate(trades_benchmark)
+
+    window_info = []
+    for (train_lo, train_hi, test_lo, _), (lo, hi), (_, elapsed) in zip(
+        windows, bounds, results
+    ):
+        window_info.append(
+            {
+                "train_start": str(dates[train_lo].date()),
+                "train_end": str(dates[train_hi - 1].date()),
+                "test_start": str(dates[test_lo].date()),
+                "test_end": str(dates[rows[hi - 1]].date()),
+                "elapsed": elapsed,
+                "metrics": portfolio_stats(
+                    model_curve[lo:hi], num_trades=np.count_nonzero(trades[lo:hi])
+                ),
+            }
+        )
+
+    return {
+        "windows": window_info,
+        "dates": np.datetime_as_string(dates.values[rows], unit="D").tolist(),
+        "model_values": (model_curve / model_curve[0]).tolist(),
+        "benchmark_values": (benchmark_curve / benchmark_curve[0]).tolist(),
+        "metrics": portfolio_stats(model_curve),
+    }
@@ -0,0 +1,468 @@
+"""
+run_benchmarks.py: Timing suite for data loading, indicators, portfolio valuation,
+model training and the API endpoints.
+
+Every benchmark runs against a synthetic dataset of configurable size, written to a
+temporary directory that the price store is pointed at. Results are written as JSON
+and can be compared against a saved baseline; the exit status is non-zero if any
+benchmark got slower than the baseline by more than the tolerance.
+
+Usage (from the backend directory)::
+
+    python -m benchmarks.run_benchmarks --output bench.json
+    python -m benchmarks.run_benchmarks --baseline bench.json --tolerance 0.2
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from .synthetic import write_dataset
+
+BENCHMARKS = []
+
+
+def benchmark(name, repeat=None):
+    """
+    Register a benchmark.
+
+    The decorated function receives the suite context and returns a zero-argument
+    callable; only calls to that callable are timed.
+
+    Args:
+        name (str): Unique benchmark name.
+        repeat (int, optional): Timed calls, overriding ``--repeat`` for slow cases.
+    """
+
+    def register(setup):
+        BENCHMARKS.append((name, setup, repeat))
+        return setup
+
+    return register
+
+
+class SuiteContext(object):
+    """
+    Dataset and settings shared by all benchmarks.
+
+    Attributes:
+        data_dir (str): Directory holding the synthetic CSV files.
+        symbols (list of str): Synthetic symbols, excluding SPY.
+        dates (pandas.DatetimeIndex): Full date range of the dataset.
+        train_dates (tuple): ``(start, end)`` of a two-year training period.
+        test_dates (tuple): ``(start, end)`` of the following year.
+    """
+
+    def __init__(self, data_dir, symbols, years):
+        self.data_dir = data_dir
+        self.symbols = symbols
+        self.dates = pd.bdate_range("2000-01-03", periods=int(years * 252))
+        train_start = self.dates[0]
+        train_end = min(train_start + pd.DateOffset(years=2), self.dates[-1])
+        test_end = min(train_end + pd.DateOffset(years=1), self.dates[-1])
+        self.train_dates = (train_start, train_end)
+        self.test_dates = (train_end + pd.Timedelta(days=1), test_end)
+        self.symbol = symbols[0]
+
+
+def _seed(seed=0):
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+# --- Data loading -------------------------------------------------------------
+
+
+@benchmark("price_store.convert_all")
+def bench_price_store_convert(ctx):
+    from app.utils.price_store import PriceStore
+
+    def run():
+        cache_dir = tempfile.mkdtemp(prefix="price_cache_")
+        PriceStore(ctx.data_dir, cache_dir=cache_dir).build_all()
+
+    return run
+
+
+@benchmark("utility.get_data")
+def bench_get_data(ctx):
+    from app.utils import utility
+
+    utility.get_data(ctx.symbols, ctx.dates)
+    return lambda: utility.get_data(ctx.symbols, ctx.dates)
+
+
+@benchmark("utility.load_panel")
+def bench_load_panel(ctx):
+    from app.utils import utility
+
+    utility.load_panel(ctx.symbols, ctx.dates)
+    return lambda: utility.load_panel(ctx.symbols, ctx.dates)
+
+
+@benchmark("utility.process_data")
+def bench_process_data(ctx):
+    from app.utils import utility
+
+    return lambda: utility.process_data(ctx.symbol, ctx.dates)
+
+
+# --- Indicators and portfolio valuation ---------------------------------------
+
+INDICATOR_PARAMS = {
+    "gold cross": {"lookback_1": 20, "lookback_2": 50},
+    "bbp": {"lookback": 14},
+    "roc": {"lookback": 14},
+    "macd": {"short_period": 12, "long_period": 26},
+    "rsi": {"lookback": 14},
+}
+
+
+def _indicator_benchmark(name):
+    def setup(ctx):
+        from app.utils import utility
+        from app.utils.indicators import INDICATOR_FUNCS
+
+        prices = utility.process_data(ctx.symbol, ctx.dates)
+        return lambda: INDICATOR_FUNCS[name](prices, **INDICATOR_PARAMS[name])
+
+    return setup
+
+
+for _name in INDICATOR_PARAMS:
+    benchmark(f"indicators.{_name.replace(' ', '_')}")(_indicator_benchmark(_name))
+
+
+@benchmark("streaming_indicators.bbp")
+def bench_streaming_bbp(ctx):
+    from app.utils import utility
+    from app.utils.streaming_indicators import make_streaming_indicator
+
+    prices = utility.process_data(ctx.symbol, ctx.dates).iloc[:, 0].to_numpy()
+    return lambda: make_streaming_indicator("bbp", lookback=14).update_many(prices)
+
+
+@benchmark("utility.compute_portvals")
+def bench_compute_portvals(ctx):
+    from app.utils import utility
+
+    prices = utility.process_data(ctx.symbol, ctx.dates)
+    rng = np.random.default_rng(0)
+    positions = rng.choice([-1000, 0, 1000], size=prices.shape[0])
+    trades = pd.DataFrame(
+        np.diff(positions, prepend=0), index=prices.index, columns=[ctx.symbol]
+    )
+    return lambda: utility.compute_portvals(trades, symbol=ctx.symbol)
+
+
+# --- Models -------------------------------------------------------------------
+
+
+def _qlearning_benchmark(dyna):
+    def setup(ctx):
+        from app.models.QLearningTrader import QLearningTrader
+
+        def run():
+            _seed()
+            model = QLearningTrader(impact=0.005, commission=9.95, dyna=dyna)
+            model.train_model(ctx.symbol, *ctx.train_dates)
+
+        return run
+
+    return setup
+
+
+benchmark("QLearningTrader.train_model", repeat=3)(_qlearning_benchmark(0))
+benchmark("QLearningTrader.train_model[dyna=20]", repeat=1)(_qlearning_benchmark(20))
+
+
+def _forest_data(ctx):
+    from app.utils import utility
+
+    prices = utility.process_data(ctx.symbol, ctx.dates).iloc[:, 0].to_numpy()
+    rng = np.random.default_rng(0)
+    data_x = rng.standard_normal((prices.shape[0], 3))
+    data_y = np.sign(np.diff(prices, append=prices[-1]))
+    return data_x, data_y
+
+
+@benchmark("BagEnsembleModel.add_evidence", repeat=3)
+def bench_forest_build(ctx):
+    from app.models.BagEnsembleModel import BagEnsembleModel
+    from app.models.TreeModel import TreeModel
+
+    data_x, data_y = _forest_data(ctx)
+
+    def run():
+        BagEnsembleModel(TreeModel, {"leaf_size": 6}, bags=10, seed=0).add_evidence(
+            data_x, data_y
+        )
+
+    return run
+
+
+@benchmark("BagEnsembleModel.query")
+def bench_forest_query(ctx):
+    from app.models.BagEnsembleModel import BagEnsembleModel
+    from app.models.TreeModel import TreeModel
+
+    data_x, data_y = _forest_data(ctx)
+    forest = BagEnsembleModel(TreeModel, {"leaf_size": 6}, bags=10, seed=0)
+    forest.add_evidence(data_x, data_y)
+    return lambda: forest.query(data_x)
+
+
+@benchmark("RandomForestTrader.train_model", repeat=3)
+def bench_forest_trader(ctx):
+    from app.models.RandomForestTrader import RandomForestTrader
+
+    def run():
+        model = RandomForestTrader(impact=0.005, commission=9.95, seed=0)
+        model.train_model(ctx.symbol, *ctx.train_dates)
+
+    return run
+
+
+@benchmark("walk_forward.window", repeat=3)
+def bench_walk_forward_window(ctx):
+    from app.models.RandomForestTrader import RandomForestTrader
+    from app.utils import utility
+    from app.utils.walk_forward import WalkForwardContext, generate_windows
+
+    prices = utility.process_data(ctx.symbol, ctx.dates)
+    # ROC drops its warm-up rows, so its frame is shorter than the prices
+    context = WalkForwardContext(
+        RandomForestTrader,
+        {"impact": 0.005, "commission": 9.95},
+        ctx.symbol,
+        prices,
+        {"roc": {"lookback": 10}, "bbp": {"lookback": 14}},
+        seed=0,
+    )
+    window = generate_windows(prices.shape[0], 252, 63)[1]
+    return lambda: context.run(window)
+
+
+# --- API endpoints --------------------------------------------------------------
+
+
+def _api_body(ctx, model_type, dates):
+    key = (
+        "qlearning_config"
+        if model_type == "QLearningTrader"
+        else "decision_tree_config"
+    )
+    config = {
+        "symbol": ctx.symbol,
+        "start_date": dates[0].isoformat(),
+        "end_date": dates[1].isoformat(),
+        "impact": 0.005,
+        "commission": 9.95,
+    }
+    if model_type == "RandomForestTrader":
+        config["seed"] = 0
+    return {"model_type": model_type, key: config}
+
+
+def _client():
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    return TestClient(app)
+
+
+def _train_via_api(client, body):
+    response = client.post("/api/train", json=body)
+    response.raise_for_status()
+    job_id = response.json()["job_id"]
+    while True:
+        response = client.get(f"/api/jobs/{job_id}/result")
+        if response.status_code != 202:
+            response.raise_for_status()
+            return response.json()["result"]["model_key"]
+        time.sleep(0.005)
+
+
+@benchmark("api.train[RandomForestTrader]", repeat=3)
+def bench_api_train(ctx):
+    client = _client()
+    body = dict(_api_body(ctx, "RandomForestTrader", ctx.train_dates), retrain=True)
+    return lambda: _train_via_api(client, body)
+
+
+def _plot_benchmark(cached):
+    def setup(ctx):
+        from app.main import plot_cache
+
+        client = _client()
+        body = _api_body(ctx, "RandomForestTrader", ctx.train_dates)
+        body["model_key"] = _train_via_api(client, body)
+        body.update(_api_body(ctx, "RandomForestTrader", ctx.test_dates))
+
+        def run():
+            if not cached:
+                plot_cache.clear()
+            client.post("/api/plot", json=body).raise_for_status()
+
+        return run
+
+    return setup
+
+
+benchmark("api.plot")(_plot_benchmark(cached=False))
+benchmark("api.plot[cached]")(_plot_benchmark(cached=True))
+
+
+@benchmark("api.price")
+def bench_api_price(ctx):
+    client = _client()
+    params = {
+        "symbol": ctx.symbol,
+        "start_date": str(ctx.dates[0].date()),
+        "end_date": str(ctx.dates[-1].date()),
+    }
+    return lambda: client.get("/api/price", params=params).raise_for_status()
+
+
+@benchmark("api.symbols")
+def bench_api_symbols(ctx):
+    client = _client()
+    return lambda: client.get("/api/symbols").raise_for_status()
+
+
+# --- Runner -------------------------------------------------------------------
+
+
+def time_callable(fn, repeat, warmup=1):
+    """
+    Time repeated calls of a function.
+
+    Args:
+        fn (callable): Zero-argument function.
+        repeat (int): Number of timed calls.
+        warmup (int, optional): Untimed calls made first.
+
+    Returns:
+        dict: Minimum, median and mean wall time in seconds, and the call count.
+    """
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "repeat": repeat,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare median times with a baseline.
+
+    Args:
+        results (dict): Benchmark name to timing dict.
+        baseline (dict): Baseline results in the same format.
+        tolerance (float): Allowed relative slowdown, e.g. 0.2 for 20%.
+
+    Returns:
+        list of tuple: ``(name, ratio, regressed)`` for benchmarks present in both.
+    """
+    rows = []
+    for name, timing in results.items():
+        if name not in baseline:
+            continue
+        ratio = timing["median"] / baseline[name]["median"]
+        rows.append((name, ratio, ratio > 1 + tolerance))
+    return rows
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--years", type=float, default=10, help="Years of history")
+    parser.add_argument("--symbols", type=int, default=20, help="Synthetic symbols")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed calls per case")
+    parser.add_argument("--seed", type=int, default=0, help="Dataset seed")
+    parser.add_argument(
+        "--filter", default="", help="Only run benchmarks whose name contains this"
+    )
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Compare with this results file")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="Allowed relative slowdown"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    work_dir = tempfile.mkdtemp(prefix="trading_bench_")
+    data_dir = os.path.join(work_dir, "data")
+    symbols = write_dataset(data_dir, args.symbols, args.years, seed=args.seed)
+    # Must be set before the app modules create their default price store
+    os.environ["PRICE_DATA_DIR"] = data_dir
+    os.environ["MODEL_STORE_DIR"] = os.path.join(work_dir, "model_store")
+    ctx = SuiteContext(data_dir, symbols, args.years)
+    # The app logs every request at INFO, which would drown out the results
+    logging.disable(logging.INFO)
+
+    results = {}
+    for name, setup, repeat in BENCHMARKS:
+        if args.filter not in name:
+            continue
+        timing = time_callable(setup(ctx), repeat or args.repeat)
+        results[name] = timing
+        print(f"{name:45s} median {timing['median'] * 1000:10.2f} ms", flush=True)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "cpu_count": os.cpu_count(),
+            "years": args.years,
+            "symbols": args.symbols,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["meta"]["years"] != args.years or (
+            baseline["meta"]["symbols"] != args.symbols
+        ):
+            print("warning: baseline was recorded with a different dataset size")
+        print(f"\nComparison with {args.baseline} (tolerance {args.tolerance:.0%}):")
+        for name, ratio, regressed in compare(
+            results, baseline["results"], args.tolerance
+        ):
+            flag = "REGRESSION" if regressed else ""
+            print(f"{name:45s} {ratio:6.2f}x {flag}")
+            status = status or int(regressed)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
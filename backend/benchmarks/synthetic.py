@@ -0,0 +1,79 @@
+"""
+synthetic.py: Synthetic price data with the layout of the files in backend/data.
+
+Prices follow a geometric Brownian motion over business days, so benchmark sizes
+(years of history, number of symbols) can be chosen freely and reproduced exactly
+from a seed.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+
+def generate_prices(
+    n_days, start="2000-01-03", s0=100.0, mu=0.05, sigma=0.25, rng=None
+):
+    """
+    Generate one symbol's daily OHLCV bars.
+
+    Args:
+        n_days (int): Number of business days.
+        start (str, optional): First trading day.
+        s0 (float, optional): Starting close price.
+        mu (float, optional): Annual drift.
+        sigma (float, optional): Annual volatility.
+        rng (numpy.random.Generator, optional): Random stream.
+
+    Returns:
+        pandas.DataFrame: Date-indexed frame with Open, High, Low, Close, Volume and
+            Adj Close columns, oldest first.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    dates = pd.bdate_range(start, periods=n_days, name="Date")
+    dt = 1 / 252
+    log_ret = (mu - sigma**2 / 2) * dt + sigma * np.sqrt(dt) * rng.standard_normal(
+        n_days
+    )
+    close = s0 * np.exp(np.cumsum(log_ret))
+    open_ = close * np.exp(sigma * np.sqrt(dt) * 0.3 * rng.standard_normal(n_days))
+    spread = np.abs(rng.standard_normal(n_days)) * sigma * np.sqrt(dt) * close
+    return pd.DataFrame(
+        {
+            "Open": open_.round(2),
+            "High": (np.maximum(open_, close) + spread).round(2),
+            "Low": (np.minimum(open_, close) - spread).round(2),
+            "Close": close.round(2),
+            "Volume": rng.integers(1_000_000, 50_000_000, n_days),
+            "Adj Close": close.round(2),
+        },
+        index=dates,
+    )
+
+
+def write_dataset(data_dir, n_symbols=10, years=10, seed=0):
+    """
+    Write SPY plus ``n_symbols`` synthetic symbols as CSV files.
+
+    Files are written newest first, like the real data.
+
+    Args:
+        data_dir (str): Output directory, created if needed.
+        n_symbols (int, optional): Number of symbols besides SPY.
+        years (float, optional): Years of daily history per symbol.
+        seed (int, optional): Seed making the dataset reproducible.
+
+    Returns:
+        list of str: The generated symbols, excluding SPY.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    n_days = int(years * 252)
+    rng = np.random.default_rng(seed)
+    symbols = [f"SYM{i:03d}" for i in range(n_symbols)]
+    for symbol in ["SPY"] + symbols:
+        df = generate_prices(
+            n_days, s0=rng.uniform(20, 200), sigma=rng.uniform(0.15, 0.45), rng=rng
+        )
+        df.iloc[::-1].to_csv(os.path.join(data_dir, f"{symbol}.csv"))
+    return symbols
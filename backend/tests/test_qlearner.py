@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from app.models.QLearner import QLearner
+
+
+def _learners(num_states, max_states, seed):
+    # Two learners with identical, non-trivial Q-tables
+    kwargs = dict(
+        num_states=num_states,
+        num_actions=3,
+        dyna=200,
+        max_dense_states=1000,
+        max_states=max_states,
+    )
+    planned, reference = QLearner(**kwargs), QLearner(**kwargs)
+    rng = np.random.default_rng(seed)
+    for _ in range(30):
+        update = (
+            int(rng.integers(0, 40)),
+            int(rng.integers(0, 3)),
+            int(rng.integers(0, 40)),
+            float(rng.normal()),
+        )
+        planned._update(*update)
+        reference._update(*update)
+    return planned, reference
+
+
+@pytest.mark.parametrize(
+    "num_states, sampled_states, max_states",
+    [
+        (50, 50, 100000),  # dense, with many repeated states
+        (10**6, 40, 100000),  # sparse
+        (10**6, 400, 64),  # sparse, evicting rows
+    ],
+)
+def test_plan_matches_sequential_updates(num_states, sampled_states, max_states):
+    for seed in range(20):
+        planned, reference = _learners(num_states, max_states, seed)
+        rng = np.random.default_rng(seed + 1000)
+        n = 200
+        sample = (
+            rng.integers(0, sampled_states, n),
+            rng.integers(0, 3, n),
+            rng.integers(0, sampled_states, n),
+            rng.normal(size=n),
+        )
+        planned.memory.sample = lambda n: sample
+
+        planned.plan(n)
+        for update in zip(*(column.tolist() for column in sample)):
+            reference._update(*update)
+
+        expected, actual = reference.get_table(), planned.get_table()
+        assert expected.keys() == actual.keys()
+        for key in expected:
+            np.testing.assert_array_equal(actual[key], expected[key])
@@ -0,0 +1,116 @@
+import copy
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.models.QLearningTrader import QLearningTrader
+from app.models.RandomForestTrader import RandomForestTrader
+from app.utils import utility
+from app.utils.indicator_cache import compute_indicator
+from app.utils.walk_forward import WalkForwardContext, generate_windows, walk_forward
+
+SYMBOL = "AAPL"
+# ROC drops its warm-up rows, so its frame is shorter than the prices
+INDICATORS = {"roc": {"lookback": 10}, "bbp": {"lookback": 14}}
+
+
+def standalone_trades(context, window):
+    """
+    Trade a window with a fresh model built from the window's dates alone.
+
+    Each period's indicators are computed from the prices up to its last day, so
+    no later bar can reach the model.
+    """
+    if context.seed is not None:
+        random.seed(context.seed)
+        np.random.seed(context.seed)
+    train_lo, train_hi, test_lo, test_hi = window
+    dates = context.prices.index
+
+    def period(lo, hi):
+        start, end = dates[lo], dates[hi - 1]
+        history = context.prices.loc[:end]
+        indicators = {
+            name: compute_indicator(name, history, params).loc[start:end]
+            for name, params in context.indicators_with_params.items()
+        }
+        return start, end, context.prices.loc[start:end], indicators
+
+    model = context.model_class(**context.model_kwargs)
+    sd, ed, prices, indicators = period(train_lo, train_hi)
+    model.train_model(
+        symbol=context.symbol,
+        sd=sd,
+        ed=ed,
+        sv=context.start_val,
+        indicators_with_params=copy.deepcopy(context.indicators_with_params),
+        prices=prices,
+        indicators=indicators,
+    )
+    sd, ed, prices, indicators = period(test_lo, test_hi)
+    trades = model.test_model(
+        symbol=context.symbol, sd=sd, ed=ed, prices=prices, indicators=indicators
+    )
+    return trades[context.symbol].to_numpy(dtype=np.float64)
+
+
+class BuyAndHoldTrader(object):
+    # Buys 1000 shares on the first test day of every window
+    def __init__(self, **kwargs):
+        pass
+
+    def train_model(self, **kwargs):
+        pass
+
+    def test_model(self, symbol, prices, **kwargs):
+        trades = pd.DataFrame(0.0, index=prices.index, columns=[symbol])
+        trades.iloc[0] = 1000
+        return trades
+
+
+@pytest.fixture(scope="module")
+def prices():
+    return utility.process_data(SYMBOL, pd.date_range("2006-01-01", "2009-12-31"))
+
+
+@pytest.mark.parametrize("model_class", [QLearningTrader, RandomForestTrader])
+def test_window_trades_like_standalone_model(prices, model_class):
+    # A window must trade exactly like a model trained and tested on the same
+    # dates alone, or it saw bars outside the window
+    context = WalkForwardContext(
+        model_class,
+        {"impact": 0.005, "commission": 9.95},
+        SYMBOL,
+        prices,
+        INDICATORS,
+        seed=0,
+    )
+    for window in generate_windows(prices.shape[0], 252, 63)[:3]:
+        trades, _ = context.run(window)
+        np.testing.assert_array_equal(trades, standalone_trades(context, window))
+
+
+def test_position_is_carried_across_windows(prices):
+    context = WalkForwardContext(BuyAndHoldTrader, {}, SYMBOL, prices, INDICATORS)
+    windows = generate_windows(prices.shape[0], 252, 63)
+    result = walk_forward(
+        context, windows, commission=9.95, impact=0.005, max_workers=1
+    )
+    # Holding on from window to window trades once, like the benchmark
+    num_trades = [window["metrics"]["num_trades"] for window in result["windows"]]
+    assert num_trades == [1] + [0] * (len(windows) - 1)
+    np.testing.assert_allclose(result["model_values"], result["benchmark_values"])
+
+
+def test_position_is_closed_before_a_gap(prices):
+    context = WalkForwardContext(BuyAndHoldTrader, {}, SYMBOL, prices, INDICATORS)
+    windows = generate_windows(prices.shape[0], 252, 63, step_days=126)
+    result = walk_forward(
+        context, windows, commission=9.95, impact=0.005, max_workers=1
+    )
+    assert len(result["dates"]) == 63 * len(windows)
+    # Every window but the last buys and then sells before the gap
+    num_trades = [window["metrics"]["num_trades"] for window in result["windows"]]
+    assert num_trades == [2] * (len(windows) - 1) + [1]
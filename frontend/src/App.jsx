@@ -1,4 +1,4 @@
-import React, { useState } from "react";
+import React, { useRef, useState } from "react";
 import "./App.css";
 import StockSection from "./components/StockSection";
 import IndicatorsSection from "./components/IndicatorsSection";
@@ -217,6 +217,10 @@ function App() {
   });
   const [trainPlotData, setTrainPlotData] = useState(null);
   const [testPlotData, setTestPlotData] = useState(null);
+  // Registry key of the last trained model, used to test that exact model
+  const [modelKey, setModelKey] = useState(null);
+  // Plot responses by request body, revalidated with their ETag
+  const plotCache = useRef(new Map());
 
   // Handle model config changes
   const handleConfigChange = (field, value) => {
@@ -276,20 +280,34 @@ function App() {
     formattedConfig,
     indicators_with_params,
     setPlotData,
+    model_key,
   ) {
+    const requestBody = JSON.stringify({
+      model_type: selectedModel,
+      qlearning_config:
+        selectedModel === "QLearningTrader" ? formattedConfig : null,
+      decision_tree_config:
+        selectedModel === "RandomForestTrader" ? formattedConfig : null,
+      indicators_with_params,
+      model_key,
+    });
+    // Revalidate plots we already have; the server answers 304 if unchanged
+    const cached = plotCache.current.get(requestBody);
+    const headers = { "Content-Type": "application/json" };
+    if (cached) {
+      headers["If-None-Match"] = cached.etag;
+    }
     const plotResponse = await fetch(`${API_URL}/api/plot`, {
       method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({
-        model_type: selectedModel,
-        qlearning_config:
-          selectedModel === "QLearningTrader" ? formattedConfig : null,
-        decision_tree_config:
-          selectedModel === "RandomForestTrader" ? formattedConfig : null,
-        indicators_with_params,
-      }),
+      headers,
+      body: requestBody,
     });
 
+    if (plotResponse.status === 304 && cached) {
+      setPlotData(cached.data);
+      return;
+    }
+
     if (!plotResponse.ok) {
       const errorData = await plotResponse.json();
       if (errorData.detail) {
@@ -306,9 +324,29 @@ function App() {
     }
 
     const plotResult = await plotResponse.json();
+    const etag = plotResponse.headers.get("ETag");
+    if (etag) {
+      plotCache.current.set(requestBody, { etag, data: plotResult });
+    }
     setPlotData(plotResult);
   }
 
+  // Poll a background job until it finishes, throwing if it did not succeed
+  async function waitForJob(jobId, intervalMs = 500) {
+    for (;;) {
+      const resultResponse = await fetch(`${API_URL}/api/jobs/${jobId}/result`);
+      if (resultResponse.status === 202) {
+        await new Promise((resolve) => setTimeout(resolve, intervalMs));
+        continue;
+      }
+      const result = await resultResponse.json();
+      if (!resultResponse.ok) {
+        throw new Error(result.detail || "Training failed");
+      }
+      return result;
+    }
+  }
+
   const handleTrain = async (e) => {
     e.preventDefault();
     const indicators_with_params = buildIndicatorsWithParams();
@@ -350,11 +388,17 @@ function App() {
         throw new Error("Training failed");
       }
 
+      // Training runs in the background; wait for the job to finish
+      const { job_id } = await trainResponse.json();
+      const { result } = await waitForJob(job_id);
+      setModelKey(result.model_key);
+
       // Get plot data for training
       await fetchAndSetPlotData(
         formattedConfig,
         indicators_with_params,
         setTrainPlotData,
+        result.model_key,
       );
     } catch (error) {
       console.error("Error:", error);
@@ -378,6 +422,7 @@ function App() {
         formattedConfig,
         indicators_with_params,
         setTestPlotData,
+        modelKey,
       );
     } catch (error) {
       console.error("Error:", error);
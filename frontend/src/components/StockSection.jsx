@@ -2,6 +2,20 @@ import React, { useState, useEffect } from "react";
 import { Line } from "react-chartjs-2";
 
 const API_URL = import.meta.env.VITE_API_URL;
+// The chart cannot show more points than this; the server downsamples to it
+const MAX_CHART_POINTS = 1000;
+const MS_PER_DAY = 86400000;
+
+// Binary /api/price body: float64 closes followed by int32 days since 1970-01-01
+function decodePriceData(buffer) {
+  const count = buffer.byteLength / 12;
+  const prices = Array.from(new Float64Array(buffer, 0, count));
+  const days = new Int32Array(buffer, count * 8, count);
+  const dates = Array.from(days, (day) =>
+    new Date(day * MS_PER_DAY).toISOString().slice(0, 10),
+  );
+  return { dates, prices };
+}
 
 export default function StockSection({ config, handleConfigChange }) {
   const [stockSymbols, setStockSymbols] = useState([]);
@@ -425,13 +439,14 @@ export default function StockSection({ config, handleConfigChange }) {
   useEffect(() => {
     if (config.symbol) {
       fetch(
-        `${API_URL}/api/price?symbol=${config.symbol}&start_date=${minDate}&end_date=${maxDate}`,
+        `${API_URL}/api/price?symbol=${config.symbol}&start_date=${minDate}&end_date=${maxDate}` +
+          `&max_points=${MAX_CHART_POINTS}&format=binary`,
       )
         .then((res) => {
           if (!res.ok) throw new Error("Failed to fetch price data");
-          return res.json();
+          return res.arrayBuffer();
         })
-        .then((data) => setPriceData(data))
+        .then((buffer) => setPriceData(decodePriceData(buffer)))
         .catch(() => setPriceData(null));
     }
   }, [config.symbol]);